@@ -0,0 +1,434 @@
+"""
+Step 2 benchmarks – compare invoice backends at scale.
+
+Generates synthetic entry sets (1 to 10,000 entries) for several consultants
+against a sample template and times each phase separately for every
+available backend:
+
+    load / fill / save   openpyxl and patch backends
+    pdf                  LibreOffice export (skipped when soffice isn't on PATH)
+    com                  Excel COM backend against springahead_fake_excel, with
+                         a per-call latency (--com-latency-ms); its round-trip
+                         counts are recorded too
+
+plus the pure helpers compute_time_blocks() and detect_period_string().
+Before timing, one invoice per size is rendered with both the openpyxl and
+patch backends; the run stops with status 1 if any cell value differs.
+Phase timings come from the same progress events the GUI uses.
+
+Results are written as JSON; pass --baseline to compare against an earlier
+run and exit with status 1 when any timing regressed beyond --threshold.
+The baseline is read before the run, so it may be the --out file itself
+(the new results then replace it).
+
+Usage:
+    python springahead_bench_step2.py --out bench_step2.json
+    python springahead_bench_step2.py --baseline bench_step2.json --threshold 0.25
+    python springahead_bench_step2.py --sizes 1,100 --consultants 3 --repeat 5
+    python springahead_bench_step2.py --com-latency-ms 0.2
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import random
+import statistics
+import sys
+import tempfile
+import time
+from datetime import date, datetime, timedelta
+
+import springahead_fake_excel as fake_excel
+import springahead_progress as progress
+import springahead_step2_invoice as step2
+
+DEFAULT_SIZES = (1, 10, 100, 1000, 10000)
+DEFAULT_PDF_SIZES = (10,)
+
+BACKENDS = {
+    "openpyxl": step2.run_step2_portable,
+    "patch": step2.run_step2_patch,
+}
+
+# Ignore differences below this many seconds when looking for regressions
+MIN_REGRESSION_SECONDS = 0.001
+
+
+# ---------- Synthetic data ----------
+
+
+def synthetic_entries(count, seed=0, first_day=date(2025, 11, 1)):
+    """`count` Step 1 style entries spread over the first half of a month."""
+    rng = random.Random(seed)
+    entries = []
+    for i in range(count):
+        day = first_day + timedelta(days=i % 15)
+        entries.append({
+            "date": day.strftime("%m/%d/%Y"),
+            "hours": rng.choice((6.0, 7.5, 8.0, 8.0, 8.25, 8.5, 9.0, 10.0)),
+            "project": f"Project {rng.randint(1, 5)}",
+            "type": rng.choice(("Regular", "Overtime")),
+        })
+    return entries
+
+
+def synthetic_consultants(count):
+    first = ("Ana", "Luis", "Maria", "Jose", "Carmen", "Pedro", "Sofia", "Juan")
+    last = ("Rivera", "Torres", "Santiago", "Ortiz", "Colon", "Vega", "Cruz", "Diaz")
+    return [f"{first[i % len(first)]} {last[(i // len(first)) % len(last)]} {i}" for i in range(count)]
+
+
+def make_sample_template(path):
+    """Write a small invoice-shaped template (needs openpyxl)."""
+    if step2.load_workbook is None:
+        raise RuntimeError(
+            "openpyxl is required to generate the sample template.\n"
+            "Install it with:\n    pip install openpyxl\n"
+            "or pass --template with an existing invoice template."
+        )
+    from openpyxl import Workbook
+    from openpyxl.styles import Font
+
+    wb = Workbook()
+    ws = wb.active
+    ws.title = "Invoice"
+    ws["A1"] = "INVOICE"
+    ws["A1"].font = Font(bold=True, size=20)
+    ws["B6"] = "Sample Consultant"
+    ws["E4"] = 100
+    ws.merge_cells("E4:F4")
+    ws["E5"] = ""
+    ws.merge_cells("E5:F5")
+    for r in range(step2.FIRST_DATA_ROW, step2.LAST_DATA_ROW + 1):
+        ws.cell(row=r, column=1).number_format = "mm/dd/yyyy"
+    ws["E40"] = f"=COUNTA(A{step2.FIRST_DATA_ROW}:A{step2.LAST_DATA_ROW})/2"
+    rates = wb.create_sheet("Rates")
+    rates["A1"] = "Hourly rate"
+    rates["B1"] = 50
+    wb.save(path)
+    return path
+
+
+# ---------- Timing ----------
+
+
+def _time_call(func, repeat):
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        samples.append(time.perf_counter() - start)
+    return statistics.median(samples)
+
+
+def bench_helpers(sizes, repeat):
+    results = {}
+    for size in sizes:
+        entries = synthetic_entries(size)
+        hours = [e["hours"] for e in entries]
+
+        results[f"helper=compute_time_blocks/entries={size}"] = _time_call(
+            lambda: [step2.compute_time_blocks(h) for h in hours], repeat
+        )
+        results[f"helper=detect_period_string/entries={size}"] = _time_call(
+            lambda: step2.detect_period_string(entries), repeat
+        )
+    return results
+
+
+def _run_backend(run, entries, period_str, template, output_dir, full_name, convert_pdf):
+    """Run one invoice and return {phase: seconds} from the progress events."""
+    phases = {}
+
+    def collect(payload):
+        if payload["event"] == "phase_finished":
+            phases[payload["phase"]] = phases.get(payload["phase"], 0.0) + payload["elapsed"]
+
+    progress.add_callback(collect)
+    try:
+        with contextlib.redirect_stdout(io.StringIO()):
+            run(
+                entries,
+                period_str,
+                template_path=template,
+                output_dir=output_dir,
+                convert_pdf=convert_pdf,
+                full_name=full_name,
+            )
+    finally:
+        progress.remove_callback(collect)
+    return phases
+
+
+def bench_backends(template, sizes, consultants, repeat, pdf_sizes):
+    """
+    Median seconds per invoice for every backend/size/phase.
+
+    Each repeat generates one invoice per consultant; phase times are
+    averaged over the consultants, then the median over repeats is kept.
+    """
+    has_libreoffice = step2.find_libreoffice() is not None
+    if not has_libreoffice:
+        print("LibreOffice not found on PATH; skipping PDF cases.")
+
+    names = synthetic_consultants(consultants)
+    results = {}
+
+    for backend, run in BACKENDS.items():
+        if backend == "openpyxl" and step2.load_workbook is None:
+            print("openpyxl not installed; skipping the openpyxl backend.")
+            continue
+
+        for size in sizes:
+            convert_pdf = has_libreoffice and size in pdf_sizes
+            per_phase = {}
+
+            for rep in range(repeat):
+                totals = {}
+                with tempfile.TemporaryDirectory(prefix="springahead_bench_") as output_dir:
+                    for index, full_name in enumerate(names):
+                        entries = synthetic_entries(size, seed=index + rep * 1000)
+                        period_str = step2.detect_period_string(entries)
+                        phases = _run_backend(
+                            run, entries, period_str, template, output_dir, full_name, convert_pdf
+                        )
+                        for phase_name, seconds in phases.items():
+                            totals[phase_name] = totals.get(phase_name, 0.0) + seconds
+
+                for phase_name, seconds in totals.items():
+                    per_phase.setdefault(phase_name, []).append(seconds / len(names))
+
+            for phase_name, samples in per_phase.items():
+                key = f"backend={backend}/entries={size}/phase={phase_name}"
+                results[key] = statistics.median(samples)
+            print(f"  {backend:<8} entries={size:<6} done")
+
+    return results
+
+
+def bench_com(sizes, repeat, latency_ms):
+    """
+    Run the Excel COM backend against FakeExcel.
+
+    Returns ({key: median seconds}, {key: COM round trips}) per size/phase.
+    Round trips are deterministic, so one count per size is enough.
+    """
+    results = {}
+    round_trips = {}
+
+    for size in sizes:
+        per_phase = {}
+        for rep in range(repeat):
+            entries = synthetic_entries(size, seed=rep)
+            period_str = step2.detect_period_string(entries)
+            excel = fake_excel.FakeExcel(
+                values={"E4": 100},
+                latency=fake_excel.LatencyModel(default_ms=latency_ms),
+            )
+            phases = {}
+
+            def collect(payload):
+                if payload["event"] == "phase_finished":
+                    phases[payload["phase"]] = phases.get(payload["phase"], 0.0) + payload["elapsed"]
+
+            progress.add_callback(collect)
+            try:
+                with tempfile.TemporaryDirectory(prefix="springahead_bench_") as output_dir:
+                    with contextlib.redirect_stdout(io.StringIO()):
+                        step2.run_step2_windows(
+                            entries,
+                            period_str,
+                            output_dir=output_dir,
+                            full_name="Sample Consultant",
+                            excel=excel,
+                        )
+            finally:
+                progress.remove_callback(collect)
+
+            for phase_name, seconds in phases.items():
+                per_phase.setdefault(phase_name, []).append(seconds)
+            round_trips[f"backend=com-fake/entries={size}"] = excel.log.total
+
+        for phase_name, samples in per_phase.items():
+            results[f"backend=com-fake/entries={size}/phase={phase_name}"] = statistics.median(samples)
+        print(f"  com-fake entries={size:<6} done ({round_trips[f'backend=com-fake/entries={size}']} round trips)")
+
+    return results, round_trips
+
+
+# ---------- Correctness ----------
+
+
+def _cell_values(path):
+    wb = step2.load_workbook(path)
+    return {
+        (ws.title, cell.coordinate): cell.value
+        for ws in wb.worksheets
+        for row in ws.iter_rows()
+        for cell in row
+        if cell.value is not None
+    }
+
+
+def check_backends_agree(template, sizes):
+    """
+    Render the same invoice with the openpyxl and patch backends and
+    return [(size, sheet, cell, openpyxl_value, patch_value)] for every
+    cell where the two workbooks differ.
+    """
+    mismatches = []
+    for size in sizes:
+        entries = synthetic_entries(size)
+        period_str = step2.detect_period_string(entries)
+        paths = {}
+        with tempfile.TemporaryDirectory(prefix="springahead_bench_check_") as tmp:
+            for backend, run in BACKENDS.items():
+                output_dir = os.path.join(tmp, backend)
+                os.makedirs(output_dir)
+                with contextlib.redirect_stdout(io.StringIO()):
+                    run(
+                        entries,
+                        period_str,
+                        template_path=template,
+                        output_dir=output_dir,
+                        convert_pdf=False,
+                        full_name="Sample Consultant",
+                    )
+                (name,) = [n for n in os.listdir(output_dir) if n.endswith(".xlsx")]
+                paths[backend] = _cell_values(os.path.join(output_dir, name))
+
+        expected, actual = paths["openpyxl"], paths["patch"]
+        for sheet, ref in sorted(expected.keys() | actual.keys()):
+            if expected.get((sheet, ref)) != actual.get((sheet, ref)):
+                mismatches.append(
+                    (size, sheet, ref, expected.get((sheet, ref)), actual.get((sheet, ref)))
+                )
+    return mismatches
+
+
+# ---------- Baselines ----------
+
+
+def compare(results, baseline, threshold):
+    """Return [(key, baseline_s, current_s)] for timings slower than allowed."""
+    regressions = []
+    for key, current in sorted(results.items()):
+        previous = baseline.get(key)
+        if previous is None:
+            continue
+        if current > previous * (1 + threshold) and current - previous > MIN_REGRESSION_SECONDS:
+            regressions.append((key, previous, current))
+    return regressions
+
+
+def compare_round_trips(round_trips, baseline):
+    """Any increase in COM round trips is a regression: [(key, baseline, current)]."""
+    return [
+        (key, baseline[key], current)
+        for key, current in sorted(round_trips.items())
+        if key in baseline and current > baseline[key]
+    ]
+
+
+def _parse_sizes(text):
+    return tuple(int(part) for part in text.split(",") if part.strip())
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the Step 2 invoice backends.")
+    parser.add_argument("--sizes", type=_parse_sizes, default=DEFAULT_SIZES,
+                        help="Comma-separated entry counts (default: 1,10,100,1000,10000).")
+    parser.add_argument("--consultants", type=int, default=5,
+                        help="Invoices generated per size and repeat (default: 5).")
+    parser.add_argument("--repeat", type=int, default=3, help="Repeats per case (median kept).")
+    parser.add_argument("--pdf-sizes", type=_parse_sizes, default=DEFAULT_PDF_SIZES,
+                        help="Sizes that also time the LibreOffice PDF export (default: 10).")
+    parser.add_argument("--template", help="Invoice template to use (default: generated sample).")
+    parser.add_argument("--out", default="bench_step2.json", help="Where to write the results JSON.")
+    parser.add_argument("--baseline", help="Earlier results JSON to compare against.")
+    parser.add_argument("--threshold", type=float, default=0.25,
+                        help="Allowed slowdown vs. baseline as a fraction (default: 0.25).")
+    parser.add_argument("--com-latency-ms", type=float, default=0.0,
+                        help="Simulated latency per fake COM call in ms (default: 0).")
+    args = parser.parse_args(argv)
+
+    # Read the baseline first: with the default --out it is the same file
+    baseline = None
+    if args.baseline:
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+
+    # Benchmarks must not consume real invoice numbers or fill the ledger
+    os.environ.pop("SPRINGAHEAD_INVOICE_ALLOCATOR", None)
+    os.environ["SPRINGAHEAD_LEDGER"] = "0"
+
+    with tempfile.TemporaryDirectory(prefix="springahead_bench_tpl_") as tmp:
+        template = args.template or make_sample_template(
+            os.path.join(tmp, "INVOICE (Template).xlsx")
+        )
+
+        if step2.load_workbook is not None:
+            print("Checking that the openpyxl and patch backends agree...")
+            mismatches = check_backends_agree(template, args.sizes)
+            if mismatches:
+                print(f"\n[MISMATCH] {len(mismatches)} cell(s) differ between the backends:")
+                for size, sheet, ref, expected, actual in mismatches:
+                    print(f"  entries={size} {sheet}!{ref}: openpyxl={expected!r} patch={actual!r}")
+                sys.exit(1)
+
+        print("Timing helpers...")
+        results = bench_helpers(args.sizes, args.repeat)
+        print("Timing backends...")
+        results.update(
+            bench_backends(template, args.sizes, args.consultants, args.repeat, args.pdf_sizes)
+        )
+        print("Timing the COM backend against fake Excel...")
+        com_results, round_trips = bench_com(args.sizes, args.repeat, args.com_latency_ms)
+        results.update(com_results)
+
+    print("\nResults (median seconds per call / per invoice):")
+    for key, seconds in sorted(results.items()):
+        print(f"  {key:<60} {seconds * 1000:10.3f} ms")
+    print("\nCOM round trips per invoice:")
+    for key, count in sorted(round_trips.items()):
+        print(f"  {key:<60} {count:10d}")
+
+    report = {
+        "meta": {
+            "created": datetime.now().isoformat(timespec="seconds"),
+            "python": sys.version.split()[0],
+            "platform": platform.platform(),
+            "sizes": list(args.sizes),
+            "consultants": args.consultants,
+            "repeat": args.repeat,
+            "com_latency_ms": args.com_latency_ms,
+        },
+        "results": results,
+        "com_round_trips": round_trips,
+    }
+    with open(args.out, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    print(f"\nSaved results to {os.path.abspath(args.out)}")
+
+    if baseline is not None:
+        regressions = compare(results, baseline.get("results", {}), args.threshold)
+        trip_regressions = compare_round_trips(round_trips, baseline.get("com_round_trips", {}))
+        if regressions:
+            print(f"\n[REGRESSION] {len(regressions)} timing(s) slower than baseline "
+                  f"by more than {args.threshold:.0%}:")
+            for key, previous, current in regressions:
+                print(f"  {key}: {previous * 1000:.3f} ms -> {current * 1000:.3f} ms")
+        if trip_regressions:
+            print(f"\n[REGRESSION] {len(trip_regressions)} COM round-trip count(s) went up:")
+            for key, previous, current in trip_regressions:
+                print(f"  {key}: {previous} -> {current}")
+        if regressions or trip_regressions:
+            sys.exit(1)
+        print(f"\nNo regressions beyond {args.threshold:.0%} vs. {args.baseline}.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,220 @@
+"""
+Persistent browser profile for Step 1.
+
+A fresh p.chromium.launch() starts with an empty profile, so every run
+re-downloads SpringAhead's JavaScript and CSS. With
+SPRINGAHEAD_BROWSER_PROFILE=1, Step 1 launches Chromium on a profile kept
+in browser_profile/ next to the scripts instead, so the HTTP cache survives
+between runs. Cookies are cleared at the start of each run, so every run
+still logs in from scratch.
+
+The HTTP cache is capped with Chromium's --disk-cache-size
+(SPRINGAHEAD_CACHE_MB, default 200). If the whole profile grows past twice
+that, its caches are cleared before the next launch.
+
+Usage:
+    python springahead_browser_profile.py info
+    python springahead_browser_profile.py clean          # drop cached files only
+    python springahead_browser_profile.py clean --all    # delete the whole profile
+"""
+
+import argparse
+import os
+import shutil
+import sys
+from pathlib import Path
+
+
+def get_app_root() -> Path:
+    if getattr(sys, "frozen", False):
+        return Path(sys.executable).resolve().parent
+    return Path(__file__).resolve().parent
+
+
+APP_ROOT = get_app_root()
+PROFILE_DIR = APP_ROOT / "browser_profile"
+DEFAULT_CACHE_MB = 200
+
+# Cache folders inside a Chromium profile; everything else is settings/state
+CACHE_DIRS = (
+    Path("Default") / "Cache",
+    Path("Default") / "Code Cache",
+    Path("Default") / "GPUCache",
+    Path("GrShaderCache"),
+    Path("ShaderCache"),
+)
+
+
+def profile_enabled():
+    """SPRINGAHEAD_BROWSER_PROFILE=1 keeps the browser profile between runs."""
+    raw = os.getenv("SPRINGAHEAD_BROWSER_PROFILE", "0").strip().lower()
+    return raw in ("1", "true", "yes", "on")
+
+
+def get_cache_limit_bytes():
+    raw = os.getenv("SPRINGAHEAD_CACHE_MB", "").strip()
+    try:
+        megabytes = float(raw) if raw else DEFAULT_CACHE_MB
+    except ValueError:
+        megabytes = DEFAULT_CACHE_MB
+    return int(max(megabytes, 1) * 1024 * 1024)
+
+
+def launch_args(limit_bytes=None):
+    """Extra Chromium arguments for the persistent profile."""
+    limit_bytes = limit_bytes or get_cache_limit_bytes()
+    return [f"--disk-cache-size={limit_bytes}"]
+
+
+def directory_size(path):
+    total = 0
+    for root, _dirs, files in os.walk(path):
+        for name in files:
+            try:
+                total += os.path.getsize(os.path.join(root, name))
+            except OSError:
+                # Lock/socket files can vanish while we walk
+                continue
+    return total
+
+
+def clear_cache(profile_dir=PROFILE_DIR):
+    """Delete cached files but keep the rest of the profile. Returns bytes freed."""
+    freed = 0
+    for relative in CACHE_DIRS:
+        path = Path(profile_dir) / relative
+        if path.exists():
+            freed += directory_size(path)
+            shutil.rmtree(path, ignore_errors=True)
+    return freed
+
+
+def remove_profile(profile_dir=PROFILE_DIR):
+    """Delete the whole profile directory. Returns bytes freed."""
+    if not Path(profile_dir).exists():
+        return 0
+    freed = directory_size(profile_dir)
+    shutil.rmtree(profile_dir, ignore_errors=True)
+    return freed
+
+
+def enforce_size_cap(profile_dir=PROFILE_DIR, limit_bytes=None):
+    """
+    Clear the caches when the profile has outgrown the cap.
+
+    --disk-cache-size only bounds the HTTP cache; code and GPU caches grow
+    on their own, so the whole profile is allowed twice the limit.
+    """
+    limit_bytes = limit_bytes or get_cache_limit_bytes()
+    if not Path(profile_dir).exists():
+        return 0
+    if directory_size(profile_dir) <= 2 * limit_bytes:
+        return 0
+    freed = clear_cache(profile_dir)
+    print(f"Browser profile over its size cap; cleared {_mb(freed)} of cache.")
+    return freed
+
+
+def _mb(size):
+    return f"{size / (1024 * 1024):.1f} MB"
+
+
+class CacheStats:
+    """
+    Count cache hits and bytes transferred for a page and every page its
+    context opens afterwards (e.g. the extra week tabs), via one CDP
+    session per page. Tabs that were already open in a reused browser are
+    left out.
+
+    A response counts as a hit when Chromium served it from the disk,
+    prefetch or memory cache. Bytes are the encoded (on-the-wire) sizes
+    reported when each request finishes.
+    """
+
+    def __init__(self, page):
+        self.responses = 0
+        self.hits = 0
+        self.bytes = 0
+        self._context = page.context
+        self._sessions = []
+        self._attach(page)
+        self._context.on("page", self._attach)
+
+    def _attach(self, page):
+        try:
+            session = self._context.new_cdp_session(page)
+        except Exception:
+            # Page closed before we got to it
+            return
+        # Request ids are only unique within one page's session
+        served_from_cache = set()
+
+        def on_served_from_cache(params):
+            served_from_cache.add(params.get("requestId"))
+
+        def on_response(params):
+            response = params.get("response", {})
+            self.responses += 1
+            if (
+                response.get("fromDiskCache")
+                or response.get("fromPrefetchCache")
+                or params.get("requestId") in served_from_cache
+            ):
+                self.hits += 1
+
+        session.on("Network.requestServedFromCache", on_served_from_cache)
+        session.on("Network.responseReceived", on_response)
+        session.on("Network.loadingFinished", self._on_finished)
+        session.send("Network.enable")
+        self._sessions.append(session)
+
+    def _on_finished(self, params):
+        self.bytes += int(params.get("encodedDataLength") or 0)
+
+    def hit_rate(self):
+        return self.hits / self.responses if self.responses else 0.0
+
+    def summary(self):
+        return (
+            f"Browser cache: {self.hits}/{self.responses} responses from cache "
+            f"({self.hit_rate():.0%}), {self.bytes / 1024:.0f} KB transferred."
+        )
+
+    def stop(self):
+        try:
+            self._context.remove_listener("page", self._attach)
+        except Exception:
+            pass
+        for session in self._sessions:
+            try:
+                session.detach()
+            except Exception:
+                # Page/browser already gone
+                pass
+        self._sessions = []
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Manage the Step 1 browser profile.")
+    sub = parser.add_subparsers(dest="command", required=True)
+    sub.add_parser("info", help="Show where the profile is and how big it is.")
+    p_clean = sub.add_parser("clean", help="Delete cached files from the profile.")
+    p_clean.add_argument("--all", action="store_true",
+                         help="Delete the whole profile (settings included).")
+    args = parser.parse_args(argv)
+
+    if args.command == "info":
+        if not PROFILE_DIR.exists():
+            print(f"No browser profile yet (would be created at {PROFILE_DIR}).")
+            return
+        print(f"Profile:   {PROFILE_DIR}")
+        print(f"Size:      {_mb(directory_size(PROFILE_DIR))}")
+        print(f"Cache cap: {_mb(get_cache_limit_bytes())} (SPRINGAHEAD_CACHE_MB)")
+        return
+
+    freed = remove_profile() if args.all else clear_cache()
+    print(f"Freed {_mb(freed)} from {PROFILE_DIR}.")
+
+
+if __name__ == "__main__":
+    main()
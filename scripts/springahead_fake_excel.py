@@ -0,0 +1,212 @@
+"""
+Fake Excel COM object model for exercising the Windows backend anywhere.
+
+run_step2_windows() talks to Excel through COM, where every property read,
+property write and method call is a cross-process round trip. FakeExcel
+stands in for win32.Dispatch("Excel.Application") with the subset the
+backend uses (Workbooks.Open, Worksheets, Cells, Range, Value, Save,
+ExportAsFixedFormat, Close, Quit). It records every call and can sleep per
+call to mimic real COM latency, so the call pattern can be counted and
+benchmarked on Linux:
+
+    excel = FakeExcel(values={"B6": "Ana Rivera", "E4": 120},
+                      latency=LatencyModel(default_ms=0.2, overrides={"ExportAsFixedFormat": 800}))
+    step2.run_step2_windows(entries, period_str, excel=excel)
+    print(excel.log.total, excel.log.counts())
+
+ExportAsFixedFormat writes a small placeholder PDF so callers that check
+for the file keep working.
+"""
+
+import os
+import re
+import time
+from collections import Counter
+
+_REF_RE = re.compile(r"^\$?([A-Z]+)\$?(\d+)$")
+
+PLACEHOLDER_PDF = b"%PDF-1.4\n% springahead fake Excel export\n%%EOF\n"
+
+
+def column_letter(col):
+    letters = ""
+    while col:
+        col, rem = divmod(col - 1, 26)
+        letters = chr(ord("A") + rem) + letters
+    return letters
+
+
+def cell_ref(row, col):
+    return f"{column_letter(col)}{row}"
+
+
+class LatencyModel:
+    """
+    How long each COM call takes, in milliseconds.
+
+    overrides maps a member name ("Cells", "Value", "ExportAsFixedFormat")
+    or "<Object>.<member>" ("Range.Value") to milliseconds; everything else
+    costs default_ms.
+    """
+
+    def __init__(self, default_ms=0.0, overrides=None):
+        self.default_ms = default_ms
+        self.overrides = dict(overrides or {})
+
+    def delay_ms(self, obj, member):
+        key = f"{obj}.{member}"
+        if key in self.overrides:
+            return self.overrides[key]
+        return self.overrides.get(member, self.default_ms)
+
+    def wait(self, obj, member):
+        ms = self.delay_ms(obj, member)
+        if ms > 0:
+            time.sleep(ms / 1000)
+
+
+class CallLog:
+    """Every COM round trip as (object, member, kind, detail); kind is get/set/call."""
+
+    def __init__(self, latency=None):
+        self.calls = []
+        self.latency = latency or LatencyModel()
+
+    def record(self, obj, member, kind, detail=None):
+        self.calls.append((obj, member, kind, detail))
+        self.latency.wait(obj, member)
+
+    @property
+    def total(self):
+        return len(self.calls)
+
+    def counts(self):
+        """{"Range.Value[set]": 64, "Worksheet.Cells[call]": 65, ...}"""
+        return dict(Counter(f"{obj}.{member}[{kind}]" for obj, member, kind, _ in self.calls))
+
+    def clear(self):
+        self.calls.clear()
+
+
+class FakeRange:
+    def __init__(self, log, sheet, ref):
+        self._log = log
+        self._sheet = sheet
+        self._ref = ref
+
+    @property
+    def Value(self):
+        self._log.record("Range", "Value", "get", self._ref)
+        return self._sheet.values.get(self._ref)
+
+    @Value.setter
+    def Value(self, value):
+        self._log.record("Range", "Value", "set", self._ref)
+        if value is None:
+            self._sheet.values.pop(self._ref, None)
+        else:
+            self._sheet.values[self._ref] = value
+
+
+class FakeWorksheet:
+    def __init__(self, log, workbook, values=None):
+        self._log = log
+        self.workbook = workbook
+        self.values = dict(values or {})
+
+    def Cells(self, row, col):
+        ref = cell_ref(row, col)
+        self._log.record("Worksheet", "Cells", "call", ref)
+        return FakeRange(self._log, self, ref)
+
+    def Range(self, ref):
+        match = _REF_RE.match(ref.upper())
+        if not match:
+            raise ValueError(f"FakeWorksheet.Range only supports single cells, not {ref!r}")
+        self._log.record("Worksheet", "Range", "call", ref)
+        return FakeRange(self._log, self, f"{match.group(1)}{match.group(2)}")
+
+    def ExportAsFixedFormat(self, Type=0, Filename=None, **kwargs):
+        self._log.record("Worksheet", "ExportAsFixedFormat", "call", Filename)
+        if self.workbook.app.fail_export:
+            raise RuntimeError("Fake Excel: export failed (fail_export=True)")
+        if Filename and os.path.isdir(os.path.dirname(os.path.abspath(Filename))):
+            with open(Filename, "wb") as f:
+                f.write(PLACEHOLDER_PDF)
+
+
+class FakeWorkbook:
+    def __init__(self, app, path, values):
+        self.app = app
+        self.path = path
+        self._log = app.log
+        self._sheets = [FakeWorksheet(app.log, self, values)]
+        self.saved = False
+        self.closed = False
+
+    def Worksheets(self, index):
+        self._log.record("Workbook", "Worksheets", "call", index)
+        return self._sheets[index - 1]  # COM collections are 1-based
+
+    def Save(self):
+        self._log.record("Workbook", "Save", "call", self.path)
+        self.saved = True
+
+    def Close(self, SaveChanges=False):
+        self._log.record("Workbook", "Close", "call", SaveChanges)
+        if SaveChanges:
+            self.saved = True
+        self.closed = True
+
+
+class FakeWorkbooks:
+    def __init__(self, app):
+        self.app = app
+        self.opened = []
+
+    def Open(self, path):
+        self.app.log.record("Workbooks", "Open", "call", path)
+        workbook = FakeWorkbook(self.app, path, self.app.initial_values)
+        self.opened.append(workbook)
+        return workbook
+
+
+class FakeExcel:
+    """
+    Stand-in for win32.Dispatch("Excel.Application").
+
+    values: initial first-sheet cell values by reference ({"B6": ..., "E4": ...}).
+    fail_export: make ExportAsFixedFormat raise, to exercise the error path.
+    """
+
+    def __init__(self, values=None, latency=None, fail_export=False):
+        self.log = CallLog(latency)
+        self.initial_values = dict(values or {})
+        self.fail_export = fail_export
+        self._workbooks = FakeWorkbooks(self)
+        self._visible = False
+        self.quit_called = False
+
+    @property
+    def Visible(self):
+        self.log.record("Application", "Visible", "get")
+        return self._visible
+
+    @Visible.setter
+    def Visible(self, value):
+        self.log.record("Application", "Visible", "set", value)
+        self._visible = bool(value)
+
+    @property
+    def Workbooks(self):
+        self.log.record("Application", "Workbooks", "get")
+        return self._workbooks
+
+    def Quit(self):
+        self.log.record("Application", "Quit", "call")
+        self.quit_called = True
+
+    @property
+    def worksheet(self):
+        """First sheet of the last opened workbook (for inspecting results)."""
+        return self._workbooks.opened[-1]._sheets[0]
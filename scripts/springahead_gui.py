@@ -5,6 +5,8 @@ import os, sys, io, datetime, ctypes
 import timesheet_master as tm
 import springahead_step1_fetch as step1
 import springahead_step2_invoice as step2
+import springahead_progress as progress
+import springahead_speculative as speculative
 
 def get_app_root() -> Path:
     if getattr(sys, "frozen", False):
@@ -28,6 +30,12 @@ if sys.stdout and not sys.stdout.encoding:
     show_failure_modal=False,   # ⬅ show summary modal on failure
     show_error_modal=True,     # ⬅ show an alert popup on failure
     show_restart_button=False, # ⬅ hide the Restart button (next section)
+    progress_regex=progress.PROGRESS_REGEX,  # ⬅ "[PROGRESS] phase i/N" lines drive the bar
+    progress_expr=progress.PROGRESS_EXPR,
+    timing_options={
+        "show_time_remaining": True,
+        "hide_time_remaining_on_complete": True,
+    },
 )
 def main():
     # Make sure we run from this script's folder (like your master script does)
@@ -157,6 +165,20 @@ def main():
     if getattr(args, "full_name", None):
         os.environ["SPRINGAHEAD_FULL_NAME"] = args.full_name
 
+    # --- Hand over (or discard) the login pre-started when the window opened ---
+    #
+    # Only runs that include Step 1 can use it; it is dropped if the
+    # credentials above differ from the ones it logged in with, or if the
+    # browser should be visible.
+    if not args.mode.startswith("Step 2 only"):
+        speculative.adopt_or_cancel(headless=not args.show_browser)
+
+    # --- Structured progress -> stdout lines Gooey understands ---
+    #
+    # Each step reports phase start/finish (with elapsed time) and i/N
+    # progress; the stdout encoding matches progress_regex above.
+    progress.add_callback(progress.stdout_callback)
+
     # --- Dispatch based on selected mode ---
     mode = args.mode
 
@@ -226,4 +248,8 @@ def main():
 
 
 if __name__ == "__main__":
+    # Gooey re-runs this program with --ignore-gooey to do the actual work;
+    # only the window process pre-starts the browser and login.
+    if "--ignore-gooey" not in sys.argv:
+        speculative.start_in_background()
     main()
\ No newline at end of file
@@ -0,0 +1,421 @@
+"""
+Ledger of generated invoices.
+
+Every invoice Step 2 writes is recorded in the "invoices" table of
+springahead_invoices.sqlite (next to the scripts, shared with the invoice
+number allocator): number, consultant, period, total hours, a fingerprint
+of the entries it was built from, the .xlsx/.pdf paths and when it was
+generated. Indexes on number, consultant, period and fingerprint keep
+lookups instant however many invoices pile up. Re-generating an invoice
+under a new number keeps the old row, marked superseded, so every number
+ever issued can still be looked up.
+
+The ledger can be rebuilt from the files themselves: "rebuild" rescans the
+output folder(s) (by default every folder it already has invoices in) for
+"<short name> INV (<period>).xlsx/.pdf" and reads the number, name, period
+and hours back out of each .xlsx (no openpyxl needed).
+
+Usage:
+    python springahead_invoice_ledger.py find --number 121
+    python springahead_invoice_ledger.py find --consultant "Ana Rivera" --since 2025-01-01
+    python springahead_invoice_ledger.py find --period "11 - 1 al 15 - 2025"
+    python springahead_invoice_ledger.py rebuild [FOLDER ...]
+
+Step 2 records invoices automatically; set SPRINGAHEAD_LEDGER=0 to skip it.
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import sys
+from datetime import date, datetime
+
+from springahead_invoice_numbers import DB_PATH
+from springahead_xlsx_patch import XlsxTemplate
+
+
+def get_app_root():
+    if getattr(sys, "frozen", False):
+        return os.path.dirname(sys.executable)
+    return os.path.dirname(os.path.abspath(__file__))
+
+
+SCRIPT_DIR = get_app_root()
+
+# Keep in sync with the Step 2 layout (rows 9–38, B/C = from/to times)
+FIRST_DATA_ROW = 9
+LAST_DATA_ROW = 38
+
+ARTIFACT_RE = re.compile(r"^(?P<short_name>.+) INV \((?P<period>.+)\)\.(?P<ext>xlsx|pdf)$", re.I)
+PERIOD_RE = re.compile(r"^(\d{1,2}) - (\d{1,2}) al (\d{1,2}) - (\d{4})$")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS invoices (
+    id           INTEGER PRIMARY KEY,
+    base_path    TEXT NOT NULL,      -- artifact path without extension
+    number       INTEGER,
+    consultant   TEXT,
+    short_name   TEXT,
+    period       TEXT NOT NULL,      -- as printed, e.g. '11 - 1 al 15 - 2025'
+    period_start TEXT,               -- ISO date, for sorting and ranges
+    total_hours  REAL,
+    days         INTEGER,
+    fingerprint  TEXT,
+    xlsx_path    TEXT,
+    pdf_path     TEXT,
+    generated_at TEXT NOT NULL,
+    superseded_at TEXT               -- set when the file was re-generated under a new number
+);
+-- One current row per file; superseded ones are kept so their numbers stay findable
+CREATE UNIQUE INDEX IF NOT EXISTS invoices_current_by_path ON invoices (base_path)
+    WHERE superseded_at IS NULL;
+CREATE INDEX IF NOT EXISTS invoices_by_number ON invoices (number);
+CREATE INDEX IF NOT EXISTS invoices_by_consultant ON invoices (consultant COLLATE NOCASE, period_start);
+CREATE INDEX IF NOT EXISTS invoices_by_period ON invoices (period);
+CREATE INDEX IF NOT EXISTS invoices_by_period_start ON invoices (period_start);
+CREATE INDEX IF NOT EXISTS invoices_by_fingerprint ON invoices (fingerprint);
+"""
+
+COLUMNS = (
+    "base_path", "number", "consultant", "short_name", "period", "period_start",
+    "total_hours", "days", "fingerprint", "xlsx_path", "pdf_path", "generated_at",
+    "superseded_at",
+)
+
+
+def ledger_enabled():
+    raw = os.getenv("SPRINGAHEAD_LEDGER", "1").strip().lower()
+    return raw not in ("0", "false", "no", "off")
+
+
+def connect(db_path=DB_PATH):
+    conn = sqlite3.connect(db_path, timeout=30)
+    conn.executescript(SCHEMA)
+    return conn
+
+
+def period_start(period_str):
+    """'11 - 1 al 15 - 2025' -> '2025-11-01' (None if it doesn't parse)."""
+    match = PERIOD_RE.match((period_str or "").strip())
+    if not match:
+        return None
+    month, start_day, _end_day, year = (int(g) for g in match.groups())
+    try:
+        return date(year, month, start_day).isoformat()
+    except ValueError:
+        return None
+
+
+def entries_fingerprint(entries):
+    """Stable hash of the entries an invoice was built from (order-independent)."""
+    canonical = sorted(
+        (e["date"], e.get("project", ""), e.get("type", ""), round(float(e["hours"]), 2))
+        for e in entries
+    )
+    return hashlib.sha256(json.dumps(canonical).encode("utf-8")).hexdigest()
+
+
+def _base_path(path):
+    return os.path.splitext(os.path.abspath(path))[0]
+
+
+def _current_rows(conn):
+    """{base_path: row} for every row that hasn't been superseded."""
+    return {
+        row[0]: dict(zip(COLUMNS, row))
+        for row in conn.execute(
+            f"SELECT {', '.join(COLUMNS)} FROM invoices WHERE superseded_at IS NULL"
+        )
+    }
+
+
+def _record(conn, row):
+    """
+    Make `row` the current ledger row for its file.
+
+    If the file's current row has a different invoice number (the same
+    consultant and period generated again), that row is marked superseded
+    instead of replaced, so the number it was issued under stays findable.
+    Otherwise (same number, or one side unknown) it is updated in place.
+    """
+    current = conn.execute(
+        "SELECT id, number FROM invoices WHERE base_path = ? AND superseded_at IS NULL",
+        (row["base_path"],),
+    ).fetchone()
+    columns = [column for column in COLUMNS if column != "superseded_at"]
+    values = tuple(row.get(column) for column in columns)
+
+    if current is not None and (
+        current[1] is None or row.get("number") is None or current[1] == row.get("number")
+    ):
+        conn.execute(
+            f"UPDATE invoices SET {', '.join(f'{column} = ?' for column in columns)} WHERE id = ?",
+            values + (current[0],),
+        )
+        return
+    if current is not None:
+        conn.execute(
+            "UPDATE invoices SET superseded_at = ? WHERE id = ?",
+            (row.get("generated_at") or datetime.now().isoformat(timespec="seconds"), current[0]),
+        )
+    conn.execute(
+        f"INSERT INTO invoices ({', '.join(columns)}) VALUES ({', '.join('?' for _ in columns)})",
+        values,
+    )
+
+
+def record_invoice(number, consultant, short_name, period, entries,
+                   xlsx_path=None, pdf_path=None, db_path=DB_PATH):
+    """Add (or replace) the ledger row for one generated invoice."""
+    artifact = xlsx_path or pdf_path
+    if artifact is None:
+        raise ValueError("record_invoice() needs an xlsx_path or a pdf_path.")
+
+    row = {
+        "base_path": _base_path(artifact),
+        "number": int(number) if number is not None else None,
+        "consultant": consultant,
+        "short_name": short_name,
+        "period": period,
+        "period_start": period_start(period),
+        "total_hours": round(sum(float(e["hours"]) for e in entries), 2),
+        "days": len({e["date"] for e in entries}),
+        "fingerprint": entries_fingerprint(entries),
+        "xlsx_path": os.path.abspath(xlsx_path) if xlsx_path else None,
+        "pdf_path": os.path.abspath(pdf_path) if pdf_path else None,
+        "generated_at": datetime.now().isoformat(timespec="seconds"),
+    }
+    conn = connect(db_path)
+    try:
+        with conn:
+            _record(conn, row)
+    finally:
+        conn.close()
+
+
+def attach_pdf(xlsx_path, pdf_path, db_path=DB_PATH):
+    """Point an already recorded .xlsx invoice at the PDF made from it later."""
+    conn = connect(db_path)
+    try:
+        with conn:
+            conn.execute(
+                "UPDATE invoices SET pdf_path = ? WHERE base_path = ? AND superseded_at IS NULL",
+                (os.path.abspath(pdf_path), _base_path(xlsx_path)),
+            )
+    finally:
+        conn.close()
+
+
+def find_invoices(number=None, consultant=None, period=None, since=None, until=None,
+                  fingerprint=None, include_superseded=False, db_path=DB_PATH):
+    """
+    Ledger rows matching every given filter, newest period first.
+
+    since / until are ISO dates compared with the period's first day.
+    Superseded rows (invoices re-generated under a new number) are included
+    with include_superseded=True, and always when looking up a number.
+    """
+    sql = f"SELECT {', '.join(COLUMNS)} FROM invoices WHERE 1 = 1"
+    params = []
+    if not include_superseded and number is None:
+        sql += " AND superseded_at IS NULL"
+    if number is not None:
+        sql += " AND number = ?"
+        params.append(int(number))
+    if consultant:
+        sql += " AND consultant = ? COLLATE NOCASE"
+        params.append(consultant)
+    if period:
+        sql += " AND period = ?"
+        params.append(period)
+    if since:
+        sql += " AND period_start >= ?"
+        params.append(since)
+    if until:
+        sql += " AND period_start <= ?"
+        params.append(until)
+    if fingerprint:
+        sql += " AND fingerprint = ?"
+        params.append(fingerprint)
+    sql += " ORDER BY period_start DESC, number DESC, id DESC"
+
+    conn = connect(db_path)
+    try:
+        return [dict(zip(COLUMNS, row)) for row in conn.execute(sql, params)]
+    finally:
+        conn.close()
+
+
+# ---------- Rebuild by rescanning files ----------
+
+
+def _hours_between(start, end):
+    try:
+        t0 = datetime.strptime(str(start).strip(), "%I:%M %p")
+        t1 = datetime.strptime(str(end).strip(), "%I:%M %p")
+    except ValueError:
+        return 0.0
+    return (t1 - t0).total_seconds() / 3600
+
+
+def read_invoice_xlsx(path):
+    """Number, consultant, period, hours and days read back from a generated invoice."""
+    workbook = XlsxTemplate(path)
+    hours = 0.0
+    days = set()
+    for row in range(FIRST_DATA_ROW, LAST_DATA_ROW + 1):
+        day = workbook.get_value(f"A{row}")
+        if day in (None, ""):
+            continue
+        days.add(day)
+        hours += _hours_between(workbook.get_value(f"B{row}"), workbook.get_value(f"C{row}"))
+
+    number = workbook.get_value("E4")
+    try:
+        number = int(float(number))
+    except (TypeError, ValueError):
+        number = None
+    return {
+        "number": number,
+        "consultant": workbook.get_value("B6") or None,
+        "period": workbook.get_value("E5") or None,
+        "total_hours": round(hours, 2),
+        "days": len(days),
+    }
+
+
+def scan_artifacts(directory):
+    """Ledger rows (without fingerprints) for the invoice files in one folder."""
+    rows = {}
+    for name in sorted(os.listdir(directory)):
+        match = ARTIFACT_RE.match(name)
+        if not match:
+            continue
+        path = os.path.abspath(os.path.join(directory, name))
+        row = rows.setdefault(_base_path(path), {
+            "base_path": _base_path(path),
+            "short_name": match.group("short_name"),
+            "period": match.group("period"),
+            "generated_at": datetime.fromtimestamp(os.path.getmtime(path)).isoformat(timespec="seconds"),
+        })
+        row[f"{match.group('ext').lower()}_path"] = path
+
+    for row in rows.values():
+        if row.get("xlsx_path"):
+            try:
+                details = read_invoice_xlsx(row["xlsx_path"])
+            except Exception as e:
+                print(f"[WARN] Could not read {row['xlsx_path']}: {e}")
+            else:
+                row.update({key: value for key, value in details.items() if value is not None})
+        row["period_start"] = period_start(row["period"])
+    return list(rows.values())
+
+
+def _folder_key(path):
+    return os.path.normcase(os.path.abspath(path))
+
+
+def rebuild(directories=None, db_path=DB_PATH):
+    """
+    Bring the ledger in line with what's on disk in `directories` (default:
+    the scripts folder plus every folder the ledger already has invoices
+    in, e.g. pipeline or service output folders).
+
+    Only rows in the scanned folders change: invoices found there are
+    added or refreshed, and rows whose files are gone are removed. Anything
+    the files can't tell us (entry fingerprints; number and name for
+    PDF-only invoices) is carried over from the old row for the same path.
+    Returns the number of invoices found.
+    """
+    conn = connect(db_path)
+    try:
+        with conn:
+            previous = _current_rows(conn)
+            if not directories:
+                directories = [SCRIPT_DIR] + sorted(
+                    {os.path.dirname(base_path) for base_path in previous}
+                )
+            scanned = {_folder_key(directory) for directory in directories}
+
+            found = set()
+            for directory in directories:
+                if not os.path.isdir(directory):
+                    print(f"[WARN] Skipping missing folder {directory}")
+                    scanned.discard(_folder_key(directory))
+                    continue
+                for row in scan_artifacts(directory):
+                    merged = dict(previous.get(row["base_path"], {}))
+                    merged.update({key: value for key, value in row.items() if value is not None})
+                    _record(conn, merged)
+                    found.add(row["base_path"])
+
+            for base_path in previous:
+                if base_path not in found and _folder_key(os.path.dirname(base_path)) in scanned:
+                    conn.execute(
+                        "DELETE FROM invoices WHERE base_path = ? AND superseded_at IS NULL",
+                        (base_path,),
+                    )
+    finally:
+        conn.close()
+    return len(found)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Look up generated invoices.")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p_find = sub.add_parser("find", help="List invoices matching the filters (all if none).")
+    p_find.add_argument("--number", type=int)
+    p_find.add_argument("--consultant", help="Full name, case-insensitive.")
+    p_find.add_argument("--period", help='Exact period, e.g. "11 - 1 al 15 - 2025".')
+    p_find.add_argument("--since", help="First period start date (YYYY-MM-DD).")
+    p_find.add_argument("--until", help="Last period start date (YYYY-MM-DD).")
+    p_find.add_argument("--fingerprint", help="Entries fingerprint (finds re-generated duplicates).")
+    p_find.add_argument("--all", action="store_true",
+                        help="Include invoices superseded by a re-generated one.")
+    p_find.add_argument("--json", action="store_true", help="Print rows as JSON.")
+
+    p_rebuild = sub.add_parser("rebuild", help="Rebuild the ledger by rescanning invoice files.")
+    p_rebuild.add_argument(
+        "folders", nargs="*",
+        help="Folders to scan (default: scripts folder and every folder already in the ledger).",
+    )
+
+    args = parser.parse_args(argv)
+
+    if args.command == "rebuild":
+        count = rebuild(args.folders or None)
+        print(f"Rebuilt the invoice ledger from {count} invoice(s) on disk.")
+        return
+
+    rows = find_invoices(
+        number=args.number,
+        consultant=args.consultant,
+        period=args.period,
+        since=args.since,
+        until=args.until,
+        fingerprint=args.fingerprint,
+        include_superseded=args.all,
+    )
+    if args.json:
+        print(json.dumps({"invoices": rows}, indent=2))
+        return
+    if not rows:
+        print("No matching invoices in the ledger.")
+        return
+    for row in rows:
+        print(
+            f"{row['number'] if row['number'] is not None else '?'} | "
+            f"{row['consultant'] or row['short_name']} | {row['period']} | "
+            f"{row['total_hours'] if row['total_hours'] is not None else '?'} hours | "
+            f"{row['pdf_path'] or row['xlsx_path']}"
+            + (f" | superseded {row['superseded_at']}" if row["superseded_at"] else "")
+        )
+
+
+if __name__ == "__main__":
+    main()
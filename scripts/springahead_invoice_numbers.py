@@ -0,0 +1,192 @@
+"""
+Atomic invoice-number allocator.
+
+Without it, each backend reads E4 from the template and adds one, so two
+runs at the same time hand out the same number. With
+SPRINGAHEAD_INVOICE_ALLOCATOR=1, Step 2 asks this module instead: numbers
+come from a SQLite sequence (springahead_invoices.sqlite next to the
+scripts) under a write lock, and every allocation records which consultant
+and period it went to.
+
+The sequence is seeded once from the template's E4 (the last number used);
+after that the template value is ignored.
+
+Usage:
+    python springahead_invoice_numbers.py list
+    python springahead_invoice_numbers.py seed 120     # next invoice will be 121
+"""
+
+import argparse
+import os
+import sqlite3
+import sys
+from datetime import datetime
+
+
+def get_app_root():
+    if getattr(sys, "frozen", False):
+        return os.path.dirname(sys.executable)
+    return os.path.dirname(os.path.abspath(__file__))
+
+
+DB_PATH = os.path.join(get_app_root(), "springahead_invoices.sqlite")
+SEQUENCE_NAME = "invoice"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS sequences (
+    name  TEXT PRIMARY KEY,
+    value INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS allocations (
+    number       INTEGER PRIMARY KEY,
+    consultant   TEXT NOT NULL,
+    period       TEXT NOT NULL,
+    allocated_at TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS allocations_by_consultant ON allocations (consultant, period);
+"""
+
+
+def allocator_enabled():
+    raw = os.getenv("SPRINGAHEAD_INVOICE_ALLOCATOR", "0").strip().lower()
+    return raw in ("1", "true", "yes", "on")
+
+
+def connect(db_path=DB_PATH):
+    # isolation_level=None: we issue BEGIN IMMEDIATE ourselves to take the
+    # write lock before reading the sequence
+    conn = sqlite3.connect(db_path, timeout=30, isolation_level=None)
+    conn.executescript(SCHEMA)
+    return conn
+
+
+def _as_int(value):
+    try:
+        return int(value or 0)
+    except (TypeError, ValueError):
+        return 0
+
+
+def allocate_invoice_number(consultant, period, template_number=None, db_path=DB_PATH):
+    """
+    Hand out the next invoice number atomically and record who got it.
+
+    template_number: the template's current E4, used only to seed the
+    sequence the first time.
+    """
+    conn = connect(db_path)
+    try:
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            row = conn.execute(
+                "SELECT value FROM sequences WHERE name = ?", (SEQUENCE_NAME,)
+            ).fetchone()
+            current = row[0] if row else _as_int(template_number)
+            number = current + 1
+
+            conn.execute(
+                "INSERT OR REPLACE INTO sequences (name, value) VALUES (?, ?)",
+                (SEQUENCE_NAME, number),
+            )
+            conn.execute(
+                "INSERT INTO allocations (number, consultant, period, allocated_at) "
+                "VALUES (?, ?, ?, ?)",
+                (number, consultant, period, datetime.now().isoformat(timespec="seconds")),
+            )
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+    finally:
+        conn.close()
+
+    return number
+
+
+def reserve_invoice_number(number, consultant, period, template_number=None, db_path=DB_PATH):
+    """
+    Record a number chosen by the caller instead of allocated here.
+
+    The sequence is moved past it, so later allocations can't hand it out
+    again. Raises ValueError if the number already went to a different
+    consultant or period (re-issuing the same invoice is fine).
+    """
+    conn = connect(db_path)
+    try:
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            taken = conn.execute(
+                "SELECT consultant, period FROM allocations WHERE number = ?", (number,)
+            ).fetchone()
+            if taken is not None and taken != (consultant, period):
+                raise ValueError(
+                    f"Invoice number {number} was already issued to {taken[0]} ({taken[1]})."
+                )
+
+            row = conn.execute(
+                "SELECT value FROM sequences WHERE name = ?", (SEQUENCE_NAME,)
+            ).fetchone()
+            current = row[0] if row else _as_int(template_number)
+            conn.execute(
+                "INSERT OR REPLACE INTO sequences (name, value) VALUES (?, ?)",
+                (SEQUENCE_NAME, max(current, number)),
+            )
+            if taken is None:
+                conn.execute(
+                    "INSERT INTO allocations (number, consultant, period, allocated_at) "
+                    "VALUES (?, ?, ?, ?)",
+                    (number, consultant, period, datetime.now().isoformat(timespec="seconds")),
+                )
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+    finally:
+        conn.close()
+
+
+def seed_sequence(last_number, db_path=DB_PATH):
+    """Set the last used number; the next allocation returns last_number + 1."""
+    conn = connect(db_path)
+    try:
+        conn.execute(
+            "INSERT OR REPLACE INTO sequences (name, value) VALUES (?, ?)",
+            (SEQUENCE_NAME, int(last_number)),
+        )
+    finally:
+        conn.close()
+
+
+def list_allocations(db_path=DB_PATH):
+    conn = connect(db_path)
+    try:
+        return conn.execute(
+            "SELECT number, consultant, period, allocated_at FROM allocations ORDER BY number"
+        ).fetchall()
+    finally:
+        conn.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="SpringAhead invoice-number allocator.")
+    sub = parser.add_subparsers(dest="command", required=True)
+    sub.add_parser("list", help="Show every allocated invoice number.")
+    p_seed = sub.add_parser("seed", help="Set the last used invoice number.")
+    p_seed.add_argument("last_number", type=int)
+    args = parser.parse_args(argv)
+
+    if args.command == "seed":
+        seed_sequence(args.last_number)
+        print(f"Next invoice number will be {args.last_number + 1}.")
+        return
+
+    rows = list_allocations()
+    if not rows:
+        print("No invoice numbers allocated yet.")
+        return
+    for number, consultant, period, allocated_at in rows:
+        print(f"{number} | {consultant} | {period} | {allocated_at}")
+
+
+if __name__ == "__main__":
+    main()
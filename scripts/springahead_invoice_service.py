@@ -0,0 +1,345 @@
+"""
+Local invoice rendering service.
+
+Keeps the invoice template (and the chosen Step 2 backend) loaded in one
+long-running process, so other tools on this machine can get an invoice
+over HTTP without paying for a Python start, an openpyxl import and a
+template read each time.
+
+API (JSON in, file out):
+    POST /invoice
+        {"entries": [...Step 1 entries...],
+         "full_name": "Ana Rivera",            # required unless the template has B6
+         "period": "11 - 1 al 15 - 2025",      # optional, detected from entries
+         "invoice_number": 121,                # optional, else allocated
+                                               # (recorded with the allocator; 400
+                                               # if it went to another invoice)
+         "format": "xlsx" | "pdf"}             # default "xlsx"
+      -> 200 with the file; X-Invoice-Number and X-Render-Ms headers
+      -> 400 {"error": ...} for bad input, 503 when PDF is asked without LibreOffice
+    GET /health
+      -> {"status": "ok", "backend": ..., "template": ...}
+
+Invoice numbers always come from the shared allocator
+(springahead_invoice_numbers.py), so concurrent requests never reuse one;
+numbers supplied by the client are recorded there too.
+The template is reloaded automatically when the file changes on disk.
+
+Usage:
+    python springahead_invoice_service.py                     # http://127.0.0.1:8765
+    python springahead_invoice_service.py --port 9000 --backend patch
+    python springahead_invoice_service.py --socket /tmp/springahead.sock   # not on Windows
+
+    curl -s -X POST http://127.0.0.1:8765/invoice \\
+         -d @springahead_current_week.json -o invoice.xlsx
+"""
+
+import argparse
+import io
+import json
+import os
+import queue
+import shutil
+import socket
+import socketserver
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import springahead_invoice_numbers as invoice_numbers
+import springahead_step2_invoice as step2
+from springahead_xlsx_patch import XlsxTemplate
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8765
+MAX_BODY_BYTES = 5 * 1024 * 1024
+
+XLSX_TYPE = "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+PDF_TYPE = "application/pdf"
+NO_LIBREOFFICE = "LibreOffice was not found on PATH; PDF output is unavailable."
+
+
+class InvoiceRequestError(ValueError):
+    """Bad request from the client (reported as HTTP 400)."""
+
+
+class InvoiceRenderer:
+    """
+    The resident part of the service: template + backend + PDF workers.
+
+    backend "patch" keeps a parsed XlsxTemplate; "openpyxl" keeps the
+    template bytes and loads a fresh workbook from memory per request
+    (openpyxl workbooks are mutable, so they can't be shared).
+    """
+
+    def __init__(self, template_path=None, backend=None, pdf_workers=None):
+        self.template_path = template_path or step2.TEMPLATE_PATH
+        self.backend = backend or step2.get_xlsx_backend()
+        if self.backend == "openpyxl" and step2.load_workbook is None:
+            raise RuntimeError(
+                "openpyxl is required for the openpyxl backend.\n"
+                "Install it with:\n    pip install openpyxl\n"
+                "or start the service with --backend patch."
+            )
+
+        self._lock = threading.Lock()
+        self._mtime = None
+        self._template = None
+        self._reload_if_changed()
+
+        # One private LibreOffice profile per concurrent conversion
+        self.libreoffice = step2.find_libreoffice()
+        self._profiles = queue.Queue()
+        self._profile_dirs = []
+        if self.libreoffice:
+            for _ in range(pdf_workers or step2.get_libreoffice_workers(os.cpu_count() or 1)):
+                profile_dir = tempfile.mkdtemp(prefix="springahead_lo_profile_")
+                self._profile_dirs.append(profile_dir)
+                self._profiles.put(profile_dir)
+
+    def _reload_if_changed(self):
+        mtime = os.path.getmtime(self.template_path)
+        if mtime == self._mtime:
+            return
+        with self._lock:
+            if mtime == self._mtime:
+                return
+            with open(self.template_path, "rb") as f:
+                data = f.read()
+            # Swapped as a pair so a request never mixes two template versions
+            self._template = (data, XlsxTemplate(data))
+            self._mtime = mtime
+            print(f"Loaded template {self.template_path}")
+
+    def close(self):
+        for profile_dir in self._profile_dirs:
+            shutil.rmtree(profile_dir, ignore_errors=True)
+
+    # ---------- Rendering ----------
+
+    def render(self, payload):
+        """Return (filename, content_type, data, invoice_number) for one request."""
+        self._reload_if_changed()
+        template_bytes, template = self._template
+
+        entries = payload.get("entries")
+        if not isinstance(entries, list) or not entries:
+            raise InvoiceRequestError("'entries' must be a non-empty list of Step 1 entries.")
+        fmt = payload.get("format", "xlsx")
+        if fmt not in ("xlsx", "pdf"):
+            raise InvoiceRequestError("'format' must be 'xlsx' or 'pdf'.")
+        if fmt == "pdf" and not self.libreoffice:
+            raise RuntimeError(NO_LIBREOFFICE)
+
+        try:
+            entries = sorted(
+                entries, key=lambda e: step2.datetime.strptime(e["date"], "%m/%d/%Y")
+            )
+            period_str = payload.get("period") or step2.detect_period_string(entries)
+        except (KeyError, TypeError, ValueError) as e:
+            raise InvoiceRequestError(f"Invalid entries: {e}") from e
+
+        full_name = str(payload.get("full_name") or template.get_value("B6") or "").strip()
+        if not full_name:
+            raise InvoiceRequestError("'full_name' is required (the template has no name in B6).")
+        full_name, short_name = step2.parse_consultant_name(full_name)
+
+        invoice_number = payload.get("invoice_number")
+        if invoice_number is not None and (
+            isinstance(invoice_number, bool) or not isinstance(invoice_number, int)
+            or invoice_number <= 0
+        ):
+            raise InvoiceRequestError("'invoice_number' must be a positive integer.")
+
+        # Validate everything before allocating, so a bad request never uses up a number
+        try:
+            cells = step2.build_invoice_cells(entries, period_str, invoice_number)
+        except (KeyError, TypeError, ValueError) as e:
+            raise InvoiceRequestError(f"Invalid entries: {e}") from e
+        cells["B6"] = full_name
+
+        if invoice_number is None:
+            invoice_number = invoice_numbers.allocate_invoice_number(
+                full_name, period_str, template_number=template.get_value("E4")
+            )
+            cells["E4"] = invoice_number
+        else:
+            # Keep the allocator from handing the client's number out again
+            try:
+                invoice_numbers.reserve_invoice_number(
+                    invoice_number, full_name, period_str,
+                    template_number=template.get_value("E4"),
+                )
+            except ValueError as e:
+                raise InvoiceRequestError(str(e)) from e
+
+        xlsx_data = self._render_xlsx(template_bytes, template, cells)
+        base_name = step2.safe_filename(f"{short_name} INV ({period_str})")
+        if fmt == "xlsx":
+            return base_name + ".xlsx", XLSX_TYPE, xlsx_data, invoice_number
+        return base_name + ".pdf", PDF_TYPE, self._render_pdf(xlsx_data, base_name), invoice_number
+
+    def _render_xlsx(self, template_bytes, template, cells):
+        if self.backend == "patch":
+            return template.render(cells)
+
+        wb = step2.load_workbook(io.BytesIO(template_bytes))
+        ws = wb.worksheets[0]
+        for ref, value in cells.items():
+            ws[ref].value = value
+        buffer = io.BytesIO()
+        wb.save(buffer)
+        return buffer.getvalue()
+
+    def _render_pdf(self, xlsx_data, base_name):
+        if not self.libreoffice:
+            raise RuntimeError(NO_LIBREOFFICE)
+
+        profile_dir = self._profiles.get()
+        try:
+            with tempfile.TemporaryDirectory(prefix="springahead_service_") as tmp:
+                xlsx_path = os.path.join(tmp, base_name + ".xlsx")
+                with open(xlsx_path, "wb") as f:
+                    f.write(xlsx_data)
+                # short_name/period only shape the PDF file name, which stays in tmp
+                pdf_path = step2.convert_with_libreoffice(
+                    self.libreoffice, xlsx_path, base_name, "service", profile_dir=profile_dir
+                )
+                if pdf_path is None:
+                    raise RuntimeError("LibreOffice PDF conversion failed.")
+                with open(pdf_path, "rb") as f:
+                    return f.read()
+        finally:
+            self._profiles.put(profile_dir)
+
+
+class InvoiceRequestHandler(BaseHTTPRequestHandler):
+    server_version = "SpringAheadInvoice/1.0"
+
+    @property
+    def renderer(self):
+        return self.server.renderer
+
+    def address_string(self):
+        # Unix-socket clients have no (host, port) address
+        if isinstance(self.client_address, tuple):
+            return super().address_string()
+        return "unix"
+
+    def _send_json(self, status, body):
+        data = json.dumps(body).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_GET(self):
+        if self.path.rstrip("/") != "/health":
+            self._send_json(404, {"error": "Not found. Use POST /invoice or GET /health."})
+            return
+        self._send_json(200, {
+            "status": "ok",
+            "backend": self.renderer.backend,
+            "template": self.renderer.template_path,
+            "pdf": bool(self.renderer.libreoffice),
+        })
+
+    def do_POST(self):
+        if self.path.rstrip("/") != "/invoice":
+            self._send_json(404, {"error": "Not found. Use POST /invoice or GET /health."})
+            return
+
+        start = time.perf_counter()
+        try:
+            length = int(self.headers.get("Content-Length") or 0)
+            if length <= 0 or length > MAX_BODY_BYTES:
+                raise InvoiceRequestError("Request body must be a JSON object up to 5 MB.")
+            try:
+                payload = json.loads(self.rfile.read(length))
+            except ValueError as e:
+                raise InvoiceRequestError(f"Request body is not valid JSON: {e}") from e
+            if not isinstance(payload, dict):
+                raise InvoiceRequestError("Request body must be a JSON object.")
+
+            filename, content_type, data, invoice_number = self.renderer.render(payload)
+        except InvoiceRequestError as e:
+            self._send_json(400, {"error": str(e)})
+            return
+        except RuntimeError as e:
+            status = 503 if not self.renderer.libreoffice and "LibreOffice" in str(e) else 500
+            self._send_json(status, {"error": str(e)})
+            return
+        except Exception as e:
+            self._send_json(500, {"error": f"{type(e).__name__}: {e}"})
+            return
+
+        self.send_response(200)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(data)))
+        self.send_header("Content-Disposition", f'attachment; filename="{filename}"')
+        self.send_header("X-Invoice-Number", str(invoice_number))
+        self.send_header("X-Render-Ms", f"{(time.perf_counter() - start) * 1000:.1f}")
+        self.end_headers()
+        self.wfile.write(data)
+
+
+if hasattr(socket, "AF_UNIX"):
+    class ThreadingUnixHTTPServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+        daemon_threads = True
+else:
+    ThreadingUnixHTTPServer = None
+
+
+def make_server(renderer, host=DEFAULT_HOST, port=DEFAULT_PORT, socket_path=None):
+    """Create (but don't start) the HTTP server; port=0 picks a free port."""
+    if socket_path:
+        if ThreadingUnixHTTPServer is None:
+            raise RuntimeError("Unix sockets are not available on this platform; use --port.")
+        if os.path.exists(socket_path):
+            os.remove(socket_path)
+        server = ThreadingUnixHTTPServer(socket_path, InvoiceRequestHandler)
+    else:
+        server = ThreadingHTTPServer((host, port), InvoiceRequestHandler)
+        server.daemon_threads = True
+    server.renderer = renderer
+    return server
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Serve invoices from a resident template.")
+    parser.add_argument("--host", default=DEFAULT_HOST,
+                        help="Interface to bind (default: 127.0.0.1, local only).")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--socket", help="Serve on this Unix socket path instead of TCP.")
+    parser.add_argument("--template", help="Invoice template (default: INVOICE (Template).xlsx).")
+    parser.add_argument("--backend", choices=("openpyxl", "patch"),
+                        help="Default: SPRINGAHEAD_XLSX_BACKEND.")
+    parser.add_argument("--pdf-workers", type=int,
+                        help="Concurrent PDF conversions (default: SPRINGAHEAD_LO_WORKERS or CPU cores).")
+    args = parser.parse_args(argv)
+
+    if not os.path.exists(args.template or step2.TEMPLATE_PATH):
+        raise FileNotFoundError(f"Template not found: {args.template or step2.TEMPLATE_PATH}")
+
+    renderer = InvoiceRenderer(args.template, args.backend, args.pdf_workers)
+    server = make_server(renderer, args.host, args.port, args.socket)
+    where = args.socket or "http://%s:%d" % server.server_address[:2]
+    print(f"Invoice service ({renderer.backend} backend) listening on {where}")
+    if not renderer.libreoffice:
+        print("LibreOffice was not found on PATH; only xlsx output is available.")
+
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("\nStopping invoice service...")
+    finally:
+        server.server_close()
+        renderer.close()
+        if args.socket and os.path.exists(args.socket):
+            os.remove(args.socket)
+
+
+if __name__ == "__main__":
+    main()
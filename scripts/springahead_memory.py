@@ -0,0 +1,545 @@
+"""
+Memory profiling and budgets.
+
+Profiling mode (SPRINGAHEAD_MEMPROFILE=1, or install() from code) hooks the
+progress phases every step already reports (browser, login, scrape, load,
+fill, save, pdf, ...) and records for each one:
+
+    - the Python heap growth at its peak (tracemalloc) and the top
+      allocating source lines
+    - the peak RSS of this process and of its child processes (Chromium,
+      LibreOffice), sampled in the background
+
+A report is printed when the process exits; set SPRINGAHEAD_MEMPROFILE_OUT
+to also save it as JSON.
+
+RSS needs psutil for child processes (pip install psutil). Without it,
+this process's RSS comes from /proc on Linux, and children are only known
+through the largest child that has already exited (resource.getrusage).
+
+Budget suite:
+    python springahead_memory.py budget
+    python springahead_memory.py budget --budgets memory_budgets.json --out memory.json
+    python springahead_memory.py budget --write-budgets memory_budgets.json --headroom 1.5
+
+runs standard synthetic workloads (timecard parse, Step 2 backends filling
+full invoices, the List view scrape in a real headless Chromium when
+Playwright is installed), each in its own process, and exits with status 1
+when its Python heap peak or RSS growth goes over its budget (MB).
+"""
+
+import argparse
+import atexit
+import contextlib
+import io
+import json
+import linecache
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+
+import springahead_progress as progress
+
+try:
+    import psutil  # type: ignore
+except ImportError:
+    psutil = None
+
+try:
+    import resource
+except ImportError:
+    resource = None  # Windows
+
+MB = 1024 * 1024
+TOP_ALLOCATORS = 5
+
+# Peak MB allowed per workload (measured peaks with ~2x headroom, at least
+# a few MB of RSS for allocator noise).
+# rss_growth_mb is the peak RSS of the process plus its children above what
+# the workload's own process used before the workload started.
+DEFAULT_BUDGETS = {
+    "parse-timecard/rows=2000": {"python_peak_mb": 4, "rss_growth_mb": 6},
+    "step2-openpyxl/invoices=20/days=15": {"python_peak_mb": 3, "rss_growth_mb": 6},
+    "step2-patch/invoices=20/days=15": {"python_peak_mb": 1, "rss_growth_mb": 4},
+    "step2-com-fake/invoices=20/days=15": {"python_peak_mb": 1.5, "rss_growth_mb": 4},
+    "step1-browser-scrape/rows=500": {"python_peak_mb": 8, "rss_growth_mb": 1000},
+}
+# A full invoice: the template has rows 9-38, two per worked day
+STEP2_DAYS = 15
+STEP2_INVOICES = 20
+
+
+def memprofile_enabled():
+    raw = os.getenv("SPRINGAHEAD_MEMPROFILE", "0").strip().lower()
+    return raw in ("1", "true", "yes", "on")
+
+
+# ---------- RSS ----------
+
+
+def _maxrss_bytes(who):
+    if resource is None:
+        return None
+    value = resource.getrusage(who).ru_maxrss
+    return value if sys.platform == "darwin" else value * 1024  # Linux reports KB
+
+
+def current_rss():
+    """(this process, all child processes) resident set size in bytes; None = unknown."""
+    if psutil is not None:
+        proc = psutil.Process()
+        children = 0
+        for child in proc.children(recursive=True):
+            try:
+                children += child.memory_info().rss
+            except (psutil.NoSuchProcess, psutil.AccessDenied):
+                continue
+        return proc.memory_info().rss, children
+
+    try:
+        with open("/proc/self/statm", "r") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE"), None
+    except (OSError, ValueError, AttributeError):
+        return None, None
+
+
+class RssSampler(threading.Thread):
+    """Samples current_rss() every `interval` seconds; peaks are read per window."""
+
+    def __init__(self, interval=0.1):
+        super().__init__(name="springahead-rss-sampler", daemon=True)
+        self.interval = interval
+        self.samples = []
+        self._lock = threading.Lock()
+        self._stop_requested = threading.Event()
+
+    def sample(self):
+        own, children = current_rss()
+        with self._lock:
+            self.samples.append((own, children))
+            return len(self.samples) - 1
+
+    def run(self):
+        while not self._stop_requested.wait(self.interval):
+            self.sample()
+
+    def stop(self):
+        self._stop_requested.set()
+        self.join(1)
+
+    def peaks_since(self, index):
+        """(peak own, peak children, peak total) over samples[index:], None = unknown."""
+        self.sample()
+        with self._lock:
+            window = self.samples[index:]
+
+        def peak(values):
+            values = [v for v in values if v is not None]
+            return max(values) if values else None
+
+        own = peak(s[0] for s in window)
+        children = peak(s[1] for s in window)
+        total = peak(s[0] + s[1] for s in window if s[0] is not None and s[1] is not None)
+        return own, children, total if total is not None else own
+
+
+# ---------- tracemalloc per phase ----------
+
+
+def _top_allocators(before, after, limit):
+    ignore = (
+        tracemalloc.Filter(False, tracemalloc.__file__),
+        tracemalloc.Filter(False, __file__),
+        tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+        tracemalloc.Filter(False, "<frozen importlib._bootstrap_external>"),
+    )
+    stats = after.filter_traces(ignore).compare_to(before.filter_traces(ignore), "lineno")
+    top = []
+    for stat in stats:
+        if stat.size_diff <= 0:
+            continue
+        frame = stat.traceback[0]
+        top.append({
+            "where": f"{frame.filename}:{frame.lineno}",
+            "code": linecache.getline(frame.filename, frame.lineno).strip(),
+            "size_mb": round(stat.size_diff / MB, 3),
+            "count": stat.count_diff,
+        })
+        if len(top) >= limit:
+            break
+    return top
+
+
+class MemoryProfiler:
+    """
+    Per-phase memory report driven by progress events.
+
+    Phases don't nest in this code base; the traced peak is reset at each
+    phase start. top=0 skips the (slow) per-phase snapshots.
+    """
+
+    def __init__(self, top=TOP_ALLOCATORS, interval=0.1):
+        self.top = top
+        self.sampler = RssSampler(interval)
+        self.phases = []
+        self._open = {}
+        self._started_here = False
+        self._run_mark = 0
+        self._run_start_bytes = 0
+        self._run_peak_bytes = 0
+
+    def start(self):
+        if not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._started_here = True
+        self._run_start_bytes = self._run_peak_bytes = tracemalloc.get_traced_memory()[0]
+        self.sampler.start()
+        self._run_mark = self.sampler.sample()
+        self._baseline = self.sampler.samples[self._run_mark]
+        progress.add_callback(self._on_event)
+        return self
+
+    def stop(self):
+        progress.remove_callback(self._on_event)
+        self.sampler.stop()
+        self.run_peaks = self.sampler.peaks_since(self._run_mark)
+        self._run_peak_bytes = max(self._run_peak_bytes, tracemalloc.get_traced_memory()[1])
+        self.run_python_peak = self._run_peak_bytes - self._run_start_bytes
+        if self._started_here:
+            tracemalloc.stop()
+
+    def _on_event(self, payload):
+        event = payload["event"]
+        if event == "phase_started":
+            # Resetting the peak would lose the run-wide one; keep it first
+            self._run_peak_bytes = max(self._run_peak_bytes, tracemalloc.get_traced_memory()[1])
+            tracemalloc.reset_peak()
+            self._open[payload["phase"]] = (
+                tracemalloc.take_snapshot() if self.top else None,
+                tracemalloc.get_traced_memory()[0],
+                self.sampler.sample(),
+            )
+        elif event == "phase_finished" and payload["phase"] in self._open:
+            before, start_bytes, mark = self._open.pop(payload["phase"])
+            peak_bytes = tracemalloc.get_traced_memory()[1]
+            self._run_peak_bytes = max(self._run_peak_bytes, peak_bytes)
+            own, children, _total = self.sampler.peaks_since(mark)
+            self.phases.append({
+                "phase": payload["phase"],
+                "python_peak_mb": round(max(0, peak_bytes - start_bytes) / MB, 3),
+                "rss_mb": round(own / MB, 1) if own is not None else None,
+                "children_rss_mb": round(children / MB, 1) if children is not None else None,
+                "top": (
+                    _top_allocators(before, tracemalloc.take_snapshot(), self.top)
+                    if self.top else []
+                ),
+            })
+
+    def to_dict(self):
+        own, children, total = getattr(self, "run_peaks", (None, None, None))
+        base_own, base_children = getattr(self, "_baseline", (None, None))
+        base_total = (
+            base_own + base_children if base_own is not None and base_children is not None
+            else base_own
+        )
+        growth = total - base_total if total is not None and base_total is not None else None
+        return {
+            "phases": self.phases,
+            "python_peak_mb": round(getattr(self, "run_python_peak", 0) / MB, 3),
+            "rss_peak_mb": round(own / MB, 1) if own is not None else None,
+            "children_rss_peak_mb": round(children / MB, 1) if children is not None else None,
+            "total_rss_peak_mb": round(total / MB, 1) if total is not None else None,
+            "rss_growth_mb": round(max(0, growth) / MB, 1) if growth is not None else None,
+            "maxrss_self_mb": _mb_or_none(_maxrss_bytes(resource.RUSAGE_SELF) if resource else None),
+            "maxrss_children_mb": _mb_or_none(
+                _maxrss_bytes(resource.RUSAGE_CHILDREN) if resource else None
+            ),
+        }
+
+    def report(self):
+        data = self.to_dict()
+        lines = ["", "[MEMORY] Per-phase memory:"]
+        for phase in data["phases"]:
+            lines.append(
+                f"  {phase['phase']:<9} python +{phase['python_peak_mb']:.1f} MB peak | "
+                f"rss {_fmt_mb(phase['rss_mb'])} | children {_fmt_mb(phase['children_rss_mb'])}"
+            )
+            for alloc in phase["top"]:
+                lines.append(f"      {alloc['size_mb']:8.3f} MB  {alloc['where']}  {alloc['code']}")
+        lines.append(
+            f"[MEMORY] Peaks: python {data['python_peak_mb']:.1f} MB | "
+            f"rss {_fmt_mb(data['rss_peak_mb'])} | children {_fmt_mb(data['children_rss_peak_mb'])} | "
+            f"max rss (OS) self {_fmt_mb(data['maxrss_self_mb'])}, "
+            f"largest exited child {_fmt_mb(data['maxrss_children_mb'])}"
+        )
+        if psutil is None:
+            lines.append("[MEMORY] Install psutil to sample the RSS of running child processes.")
+        return "\n".join(lines)
+
+
+def _mb_or_none(value):
+    return round(value / MB, 1) if value is not None else None
+
+
+def _fmt_mb(value):
+    return "n/a" if value is None else f"{value:.1f} MB"
+
+
+_installed = None
+
+
+def install():
+    """Start profiling this process and print the report at exit (idempotent)."""
+    global _installed
+    if _installed is not None:
+        return _installed
+    _installed = MemoryProfiler().start()
+
+    def finish():
+        _installed.stop()
+        print(_installed.report())
+        out = os.getenv("SPRINGAHEAD_MEMPROFILE_OUT", "").strip()
+        if out:
+            with open(out, "w", encoding="utf-8") as f:
+                json.dump(_installed.to_dict(), f, indent=2)
+            print(f"[MEMORY] Saved report to {os.path.abspath(out)}")
+
+    atexit.register(finish)
+    return _installed
+
+
+def install_if_enabled():
+    return install() if memprofile_enabled() else None
+
+
+# ---------- Budget suite ----------
+
+
+def synthetic_list_view_html(rows):
+    """A List view page shaped like SpringAhead's, with `rows` time rows."""
+    import springahead_bench_step2 as bench
+
+    cells = []
+    for entry in bench.synthetic_entries(rows):
+        cells.append(
+            '<tr class="timeRow">'
+            f'<td><span class="timedayDate">{entry["date"]}</span></td>'
+            f'<td><span class="timedayProject">{entry["project"]}</span></td>'
+            f'<td class="timedayType"><span class="timedayType">{entry["type"]}</span></td>'
+            f'<td class="timedayHours">{entry["hours"]:.2f}</td>'
+            "</tr>"
+        )
+    return f'<html><body><table class="timedayTable">{"".join(cells)}</table></body></html>'
+
+
+def _workload_parse_timecard(tmp):
+    from springahead_timecard_parser import parse_timecard_html
+
+    html = synthetic_list_view_html(2000)
+    with progress.phase("scrape"):
+        parse_timecard_html(html)
+
+
+def _step2_workload(backend):
+    def run(tmp):
+        import springahead_bench_step2 as bench
+        import springahead_step2_invoice as step2
+
+        template = os.path.join(tmp, "INVOICE (Template).xlsx")
+        run_backend = step2.run_step2_patch if backend == "patch" else step2.run_step2_portable
+        for i, full_name in enumerate(bench.synthetic_consultants(STEP2_INVOICES)):
+            entries = bench.synthetic_entries(STEP2_DAYS, seed=i)
+            period_str = step2.detect_period_string(entries)
+            if backend == "com-fake":
+                import springahead_fake_excel as fake_excel
+
+                step2.run_step2_windows(
+                    entries, period_str, output_dir=tmp, full_name=full_name,
+                    excel=fake_excel.FakeExcel(values={"E4": 100}),
+                )
+            else:
+                run_backend(entries, period_str, template_path=template, output_dir=tmp,
+                            convert_pdf=False, full_name=full_name)
+
+    return run
+
+
+def _workload_browser_scrape(tmp):
+    import springahead_step1_fetch as step1
+
+    with step1.sync_playwright() as p:
+        with progress.phase("browser"):
+            page, close = step1.open_browser_page(p, headless=True)
+        try:
+            page.set_content(synthetic_list_view_html(500))
+            with progress.phase("scrape"):
+                step1._scrape_list_view(page)
+        finally:
+            close()
+
+
+def _import_workload_modules():
+    """Imports done before measuring, so they're not counted against any workload."""
+    import springahead_bench_step2  # noqa: F401
+    import springahead_fake_excel  # noqa: F401
+    import springahead_step2_invoice  # noqa: F401
+    import springahead_timecard_parser  # noqa: F401
+
+    try:
+        import openpyxl  # noqa: F401
+    except ImportError:
+        pass
+
+
+def _workload_available(name):
+    if name.startswith("step2-"):
+        try:
+            import openpyxl  # noqa: F401  (the sample template is written with openpyxl)
+        except ImportError:
+            return "openpyxl is not installed"
+    if name.startswith("step1-browser"):
+        try:
+            import playwright  # noqa: F401
+        except ImportError:
+            return "Playwright is not installed"
+    return None
+
+
+WORKLOADS = {
+    "parse-timecard/rows=2000": _workload_parse_timecard,
+    f"step2-openpyxl/invoices={STEP2_INVOICES}/days={STEP2_DAYS}": _step2_workload("openpyxl"),
+    f"step2-patch/invoices={STEP2_INVOICES}/days={STEP2_DAYS}": _step2_workload("patch"),
+    f"step2-com-fake/invoices={STEP2_INVOICES}/days={STEP2_DAYS}": _step2_workload("com-fake"),
+    "step1-browser-scrape/rows=500": _workload_browser_scrape,
+}
+
+
+def measure(workload, tmp):
+    """Run one workload under a fresh profiler and return its report dict."""
+    _import_workload_modules()
+    # Budgets only need the peaks; per-phase snapshots would dominate the run time
+    profiler = MemoryProfiler(top=0).start()
+    try:
+        with contextlib.redirect_stdout(io.StringIO()):
+            workload(tmp)
+    finally:
+        profiler.stop()
+    return profiler.to_dict()
+
+
+def measure_in_subprocess(name, tmp):
+    """
+    measure() one workload in a fresh interpreter, so its RSS isn't mixed
+    with the memory earlier workloads left behind in this process.
+    """
+    result = subprocess.run(
+        [sys.executable, os.path.abspath(__file__), "measure", name, tmp],
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+        text=True,
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f"Memory workload {name} failed:\n{result.stderr}")
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def check_budgets(results, budgets):
+    """[(workload, metric, measured, budget)] for every peak over budget."""
+    overruns = []
+    for name, measured in results.items():
+        for metric, limit in budgets.get(name, {}).items():
+            value = measured.get(metric)
+            if value is not None and value > limit:
+                overruns.append((name, metric, value, limit))
+    return overruns
+
+
+def run_budget_suite(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="springahead_memory.py budget",
+        description="Fail when synthetic workloads exceed their memory budgets.",
+    )
+    parser.add_argument("--budgets", help="JSON file {workload: {metric: MB}} (default: built-in).")
+    parser.add_argument("--only", help="Comma-separated workload names to run.")
+    parser.add_argument("--out", help="Write the measured results as JSON.")
+    parser.add_argument("--write-budgets", help="Write measured peaks x --headroom as a budgets file.")
+    parser.add_argument("--headroom", type=float, default=1.5)
+    args = parser.parse_args(argv)
+
+    budgets = DEFAULT_BUDGETS
+    if args.budgets:
+        with open(args.budgets, "r", encoding="utf-8") as f:
+            budgets = json.load(f)
+
+    names = [n.strip() for n in args.only.split(",")] if args.only else list(WORKLOADS)
+    # Synthetic runs must not touch real invoice numbers or the ledger
+    os.environ.pop("SPRINGAHEAD_INVOICE_ALLOCATOR", None)
+    os.environ["SPRINGAHEAD_LEDGER"] = "0"
+
+    results = {}
+    with tempfile.TemporaryDirectory(prefix="springahead_memory_") as tmp:
+        if any(name.startswith("step2-") for name in names) and not _workload_available("step2-"):
+            import springahead_bench_step2 as bench
+
+            bench.make_sample_template(os.path.join(tmp, "INVOICE (Template).xlsx"))
+        for name in names:
+            if name not in WORKLOADS:
+                parser.error(f"unknown workload {name!r}; choose from {', '.join(WORKLOADS)}")
+            reason = _workload_available(name)
+            if reason:
+                print(f"  {name:<36} skipped ({reason})")
+                continue
+            start = time.perf_counter()
+            results[name] = measure_in_subprocess(name, tmp)
+            r = results[name]
+            print(
+                f"  {name:<36} python {r['python_peak_mb']:7.1f} MB | "
+                f"rss +{_fmt_mb(r['rss_growth_mb']):>9} | {time.perf_counter() - start:.1f}s"
+            )
+
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            json.dump({"results": results}, f, indent=2)
+        print(f"\nSaved results to {os.path.abspath(args.out)}")
+
+    if args.write_budgets:
+        new_budgets = {
+            name: {
+                metric: round(r[metric] * args.headroom, 1)
+                for metric in ("python_peak_mb", "rss_growth_mb")
+                if r.get(metric) is not None
+            }
+            for name, r in results.items()
+        }
+        with open(args.write_budgets, "w", encoding="utf-8") as f:
+            json.dump(new_budgets, f, indent=2)
+        print(f"Wrote budgets ({args.headroom}x measured) to {os.path.abspath(args.write_budgets)}")
+        return
+
+    overruns = check_budgets(results, budgets)
+    if overruns:
+        print(f"\n[BUDGET] {len(overruns)} peak(s) over budget:")
+        for name, metric, value, limit in overruns:
+            print(f"  {name} {metric}: {value:.1f} MB > {limit:.1f} MB")
+        sys.exit(1)
+    print("\nAll workloads within their memory budgets.")
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    if len(argv) == 3 and argv[0] == "measure":
+        # Internal: one workload per process, see measure_in_subprocess()
+        print(json.dumps(measure(WORKLOADS[argv[1]], argv[2])))
+        return
+    if not argv or argv[0] != "budget":
+        print(__doc__)
+        sys.exit(2)
+    run_budget_suite(argv[1:])
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,330 @@
+"""
+Stage pipeline – fetch → fill → PDF export for many jobs at once.
+
+timesheet_master.py runs one consultant/period strictly in sequence, so the
+browser sits idle while the invoice is built and vice versa. This
+orchestrator models the three steps as asyncio stages connected by bounded
+queues, each with its own concurrency limit; a job moves to the next stage
+as soon as it is ready. Throughput and per-stage utilization are reported
+at the end.
+
+Jobs file (JSON):
+    {
+      "jobs": [
+        {"name": "ana", "company": "...", "username": "...", "password": "...",
+         "full_name": "Ana Rivera"},
+        {"name": "luis", "json": "luis_week.json", "full_name": "Luis Torres"}
+      ]
+    }
+
+A job with "json" (an existing Step 1 file) or "entries" skips the fetch
+stage. Missing credentials fall back to the usual env vars / MyCreds.env.
+
+Usage:
+    python springahead_pipeline.py                       # one job = timesheet_master
+    python springahead_pipeline.py --jobs jobs.json --fill-workers 2 --export-workers 4
+
+Invoices are built with the portable backends (openpyxl or
+SPRINGAHEAD_XLSX_BACKEND=patch) and exported with LibreOffice; the Excel
+COM backend is single-instance and is not used here. With more than one
+job the invoice-number allocator (SPRINGAHEAD_INVOICE_ALLOCATOR) is turned
+on automatically, since "template E4 + 1" would give every job the same
+number; the pipeline refuses to run if it has been explicitly turned off.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import re
+import shutil
+import sys
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+
+import springahead_invoice_numbers as invoice_numbers
+import springahead_step2_invoice as step2
+
+_DONE = object()
+
+
+def get_app_root() -> Path:
+    if getattr(sys, "frozen", False):
+        return Path(sys.executable).resolve().parent
+    return Path(__file__).resolve().parent
+
+
+APP_ROOT = get_app_root()
+
+
+class StageStats:
+    def __init__(self, name, workers):
+        self.name = name
+        self.workers = workers
+        self.busy = 0.0
+        self.done = 0
+        self.failed = 0
+
+    def utilization(self, wall):
+        if wall <= 0 or self.workers <= 0:
+            return 0.0
+        return self.busy / (wall * self.workers)
+
+
+def load_jobs(path):
+    with open(path, "r", encoding="utf-8") as f:
+        jobs = json.load(f).get("jobs", [])
+    for index, job in enumerate(jobs):
+        job.setdefault("name", f"job{index + 1}")
+    return jobs
+
+
+def _job_json_path(job, single):
+    if job.get("json"):
+        return Path(job["json"])
+    if single:
+        return APP_ROOT / "springahead_current_week.json"
+    slug = re.sub(r"[^A-Za-z0-9_-]+", "_", job["name"])
+    return APP_ROOT / f"springahead_{slug}.json"
+
+
+# ---------- Stage work (runs in worker threads) ----------
+
+
+def _fetch(job):
+    # Imported here so fill/export-only jobs don't need Playwright installed
+    import springahead_step1_fetch as step1
+
+    creds = {
+        "company": job.get("company"),
+        "username": job.get("username"),
+        "password": job.get("password"),
+    }
+    if not all(creds.values()):
+        creds = step1.load_credentials()
+
+    raw = os.getenv("SPRINGAHEAD_HEADLESS", "1").strip().lower()
+    return step1.fetch_worked_days(
+        creds,
+        headless=raw not in ("0", "false", "no", "off"),
+        cdp_url=step1.get_cdp_url(),
+        capture=step1.get_capture_mode(),
+        weeks=step1.get_week_count(),
+    )
+
+
+def _fill(job):
+    entries = sorted(job["entries"], key=lambda e: datetime.strptime(e["date"], "%m/%d/%Y"))
+    period_str = step2.detect_period_string(entries)
+    run = step2.run_step2_patch if step2.get_xlsx_backend() == "patch" else step2.run_step2_portable
+    xlsx_path = run(
+        entries,
+        period_str,
+        output_dir=job.get("output_dir"),
+        convert_pdf=False,
+        full_name=job.get("full_name"),
+    )
+    return xlsx_path, period_str
+
+
+def _export(cmd, job, profile_dir):
+    # Invoices are saved as "<short name> INV (<period>).xlsx"
+    stem = os.path.splitext(os.path.basename(job["xlsx"]))[0]
+    short_name = stem.split(" INV (")[0]
+    return step2.convert_with_libreoffice(
+        cmd, job["xlsx"], short_name, job["period"], profile_dir=profile_dir
+    )
+
+
+# ---------- Orchestration ----------
+
+
+def _require_allocator():
+    """Multi-job runs need the allocator, or every invoice gets the same number."""
+    if invoice_numbers.allocator_enabled():
+        return
+    if os.getenv("SPRINGAHEAD_INVOICE_ALLOCATOR", "").strip():
+        raise RuntimeError(
+            "SPRINGAHEAD_INVOICE_ALLOCATOR is turned off, but a run with several jobs "
+            "needs it so each invoice gets its own number.\n"
+            "Unset it (or set it to 1), or run the jobs one at a time."
+        )
+    print("Several jobs: taking invoice numbers from the allocator (springahead_invoices.sqlite).")
+    # Read by step2.assign_invoice_number in the fill worker threads
+    os.environ["SPRINGAHEAD_INVOICE_ALLOCATOR"] = "1"
+
+
+async def _stage_worker(stats, inbox, outbox, work):
+    while True:
+        job = await inbox.get()
+        if job is _DONE:
+            await inbox.put(_DONE)  # let sibling workers see it too
+            return
+
+        start = time.perf_counter()
+        try:
+            await work(job)
+        except Exception as e:
+            stats.failed += 1
+            job["error"] = f"{stats.name}: {e}"
+            print(f"[ERROR] {job['name']} failed in {stats.name}: {e}")
+        else:
+            stats.done += 1
+            if outbox is not None:
+                await outbox.put(job)
+        finally:
+            stats.busy += time.perf_counter() - start
+
+
+async def run_pipeline(jobs, fetch_workers=1, fill_workers=1, export_workers=None, queue_size=2):
+    """
+    Run every job through fetch → fill → export.
+
+    Returns (jobs, stats, wall_seconds); each job dict gains "entries",
+    "xlsx", "pdf" and, on failure, "error".
+    """
+    single = len(jobs) == 1
+    if not single:
+        _require_allocator()
+    cmd = step2.find_libreoffice()
+    if cmd is None:
+        print("LibreOffice was not found on PATH; the export stage will be skipped.")
+    export_workers = export_workers or step2.get_libreoffice_workers(len(jobs))
+
+    stats = {
+        "fetch": StageStats("fetch", fetch_workers),
+        "fill": StageStats("fill", fill_workers),
+        "export": StageStats("export", export_workers if cmd else 0),
+    }
+    to_fetch = asyncio.Queue()
+    to_fill = asyncio.Queue(maxsize=queue_size)
+    to_export = asyncio.Queue(maxsize=queue_size)
+    profile_dirs = []
+
+    async def fetch(job):
+        if "entries" not in job:
+            json_path = _job_json_path(job, single)
+            if job.get("json"):
+                with open(json_path, "r", encoding="utf-8") as f:
+                    job["entries"] = json.load(f).get("entries", [])
+            else:
+                job["entries"] = await asyncio.to_thread(_fetch, job)
+                json_path.write_text(
+                    json.dumps({"entries": job["entries"]}, indent=2), encoding="utf-8"
+                )
+        if not job["entries"]:
+            raise RuntimeError("no worked days with hours > 0")
+
+    async def fill(job):
+        job["xlsx"], job["period"] = await asyncio.to_thread(_fill, job)
+
+    def export_for_worker():
+        # One private office profile per export worker (LibreOffice profile lock)
+        profile_dir = tempfile.mkdtemp(prefix="springahead_lo_profile_")
+        profile_dirs.append(profile_dir)
+
+        async def export(job):
+            job["pdf"] = await asyncio.to_thread(_export, cmd, job, profile_dir)
+            if job["pdf"] is None:
+                raise RuntimeError("LibreOffice PDF conversion failed")
+            step2.attach_pdf_in_ledger(job["xlsx"], job["pdf"])
+
+        return export
+
+    for job in jobs:
+        to_fetch.put_nowait(job)
+    to_fetch.put_nowait(_DONE)
+
+    wall_start = time.perf_counter()
+    try:
+        fetchers = [
+            asyncio.create_task(_stage_worker(stats["fetch"], to_fetch, to_fill, fetch))
+            for _ in range(fetch_workers)
+        ]
+        fillers = [
+            asyncio.create_task(
+                _stage_worker(stats["fill"], to_fill, to_export if cmd else None, fill)
+            )
+            for _ in range(fill_workers)
+        ]
+        exporters = [
+            asyncio.create_task(
+                _stage_worker(stats["export"], to_export, None, export_for_worker())
+            )
+            for _ in range(export_workers if cmd else 0)
+        ]
+
+        await asyncio.gather(*fetchers)
+        await to_fill.put(_DONE)
+        await asyncio.gather(*fillers)
+        if exporters:
+            await to_export.put(_DONE)
+            await asyncio.gather(*exporters)
+    finally:
+        for profile_dir in profile_dirs:
+            shutil.rmtree(profile_dir, ignore_errors=True)
+
+    return jobs, stats, time.perf_counter() - wall_start
+
+
+def print_report(jobs, stats, wall):
+    ok = [job for job in jobs if "error" not in job]
+    print("\n======================================")
+    print("  Pipeline summary")
+    print("======================================")
+    print(f"Jobs: {len(ok)}/{len(jobs)} succeeded in {wall:.1f}s "
+          f"({len(ok) / wall * 60 if wall > 0 else 0:.1f} jobs/min)")
+    for stage in stats.values():
+        if stage.workers == 0:
+            print(f"  {stage.name:<7} skipped")
+            continue
+        print(
+            f"  {stage.name:<7} workers={stage.workers} done={stage.done} "
+            f"failed={stage.failed} busy={stage.busy:.1f}s "
+            f"utilization={stage.utilization(wall):.0%}"
+        )
+    for job in jobs:
+        if "error" in job:
+            print(f"  - {job['name']}: FAILED ({job['error']})")
+        else:
+            print(f"  - {job['name']}: {job.get('pdf') or job.get('xlsx')}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run fetch → fill → export for many jobs.")
+    parser.add_argument("--jobs", help="Jobs JSON file (default: one job from env / MyCreds.env).")
+    parser.add_argument("--fetch-workers", type=int, default=1)
+    parser.add_argument("--fill-workers", type=int, default=1)
+    parser.add_argument("--export-workers", type=int,
+                        help="Default: SPRINGAHEAD_LO_WORKERS or one per CPU core.")
+    parser.add_argument("--queue-size", type=int, default=2,
+                        help="Max jobs waiting between two stages (default: 2).")
+    args = parser.parse_args(argv)
+
+    if args.jobs:
+        jobs = load_jobs(args.jobs)
+    else:
+        jobs = [{"name": "current", "full_name": os.getenv("SPRINGAHEAD_FULL_NAME") or None}]
+
+    if not jobs:
+        print("No jobs to run.")
+        return
+
+    jobs, stats, wall = asyncio.run(
+        run_pipeline(
+            jobs,
+            fetch_workers=args.fetch_workers,
+            fill_workers=args.fill_workers,
+            export_workers=args.export_workers,
+            queue_size=args.queue_size,
+        )
+    )
+    print_report(jobs, stats, wall)
+    if any("error" in job for job in jobs):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,113 @@
+"""
+Structured progress events for the SpringAhead pipeline.
+
+Steps report what they are doing through a small callback API instead of
+free-form prints only:
+
+    import springahead_progress as progress
+
+    with progress.phase("login"):
+        ...
+    progress.advance("scrape", i, total)
+
+Every event is a plain dict, e.g.:
+
+    {"event": "phase_started",  "phase": "login", "time": 1700000000.0}
+    {"event": "phase_finished", "phase": "login", "elapsed": 2.31, "ok": True}
+    {"event": "progress",       "phase": "scrape", "current": 3, "total": 10}
+
+Register callbacks with add_callback(). For Gooey (or any wrapper that only
+sees stdout), install stdout_callback, which prints lines like:
+
+    [PHASE] login started
+    [PROGRESS] scrape 3/10
+    [PHASE] login finished in 2.3s
+
+PROGRESS_REGEX / PROGRESS_EXPR match that format and can be passed straight
+to @Gooey(progress_regex=..., progress_expr=...).
+"""
+
+import time
+from contextlib import contextmanager
+
+# Gooey reads these groups from each stdout line and evaluates PROGRESS_EXPR
+PROGRESS_REGEX = r"^\[PROGRESS\] \S+ (?P<current>\d+)/(?P<total>\d+)$"
+PROGRESS_EXPR = "current / total * 100"
+
+_callbacks = []
+
+
+def add_callback(callback):
+    """Register a callable that receives every progress event dict."""
+    if callback not in _callbacks:
+        _callbacks.append(callback)
+
+
+def remove_callback(callback):
+    if callback in _callbacks:
+        _callbacks.remove(callback)
+
+
+def emit(event, **fields):
+    """
+    Send one event to all registered callbacks.
+
+    A failing callback never breaks the pipeline; it's reported and skipped.
+    """
+    payload = {"event": event, "time": time.time()}
+    payload.update(fields)
+    for callback in list(_callbacks):
+        try:
+            callback(payload)
+        except Exception as e:
+            print(f"[WARN] Progress callback failed: {e}")
+    return payload
+
+
+def advance(phase_name, current, total):
+    """Report i/N progress inside a phase (e.g. rows scraped)."""
+    emit("progress", phase=phase_name, current=int(current), total=int(total))
+
+
+@contextmanager
+def phase(phase_name):
+    """
+    Wrap a unit of work in phase_started / phase_finished events.
+
+    phase_finished always fires (also on errors) with the elapsed seconds
+    and ok=False when the block raised.
+    """
+    start = time.perf_counter()
+    emit("phase_started", phase=phase_name)
+    ok = False
+    try:
+        yield
+        ok = True
+    finally:
+        emit(
+            "phase_finished",
+            phase=phase_name,
+            elapsed=time.perf_counter() - start,
+            ok=ok,
+        )
+
+
+def format_event(payload):
+    """Encode an event as the single stdout line used by stdout_callback."""
+    event = payload.get("event")
+    phase_name = payload.get("phase", "")
+    if event == "phase_started":
+        return f"[PHASE] {phase_name} started"
+    if event == "phase_finished":
+        status = "finished" if payload.get("ok", True) else "failed"
+        return f"[PHASE] {phase_name} {status} in {payload.get('elapsed', 0.0):.1f}s"
+    if event == "progress":
+        return f"[PROGRESS] {phase_name} {payload['current']}/{payload['total']}"
+    return None
+
+
+def stdout_callback(payload):
+    """Print events in the Gooey-friendly line format (see PROGRESS_REGEX)."""
+    line = format_event(payload)
+    if line:
+        print(line, flush=True)
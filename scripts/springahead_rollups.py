@@ -0,0 +1,319 @@
+"""
+Hours rollups by project, type and period.
+
+Keeps a small SQLite database next to the scripts with every fetched entry
+plus pre-aggregated weekly/monthly totals per consultant, project and type.
+Totals are updated incrementally on each ingest, so summaries over years of
+history never rescan the raw entries.
+
+Usage:
+    python springahead_rollups.py ingest [springahead_current_week.json] [--consultant NAME]
+    python springahead_rollups.py summary --grain month [--consultant NAME] [--project P] [--type T]
+    python springahead_rollups.py export --grain week --format csv --out hours.csv
+    python springahead_rollups.py rebuild
+
+Step 1 ingests automatically after each fetch when SPRINGAHEAD_ROLLUPS=1.
+"""
+
+import argparse
+import csv
+import io
+import json
+import os
+import sqlite3
+import sys
+from datetime import date, datetime, timedelta
+from pathlib import Path
+
+
+def get_app_root() -> Path:
+    if getattr(sys, "frozen", False):
+        return Path(sys.executable).resolve().parent
+    return Path(__file__).resolve().parent
+
+
+APP_ROOT = get_app_root()
+DB_PATH = APP_ROOT / "springahead_rollups.sqlite"
+JSON_PATH = APP_ROOT / "springahead_current_week.json"
+
+GRAINS = ("week", "month")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS entries (
+    consultant TEXT NOT NULL,
+    date       TEXT NOT NULL,   -- ISO yyyy-mm-dd
+    project    TEXT NOT NULL,
+    type       TEXT NOT NULL,
+    hours      REAL NOT NULL,
+    PRIMARY KEY (consultant, date, project, type)
+);
+CREATE TABLE IF NOT EXISTS rollups (
+    grain      TEXT NOT NULL,   -- 'week' (2025-W45) or 'month' (2025-11)
+    period     TEXT NOT NULL,
+    consultant TEXT NOT NULL,
+    project    TEXT NOT NULL,
+    type       TEXT NOT NULL,
+    hours      REAL NOT NULL,
+    days       INTEGER NOT NULL,
+    PRIMARY KEY (grain, period, consultant, project, type)
+);
+CREATE INDEX IF NOT EXISTS rollups_by_project ON rollups (grain, project, period);
+CREATE INDEX IF NOT EXISTS rollups_by_type ON rollups (grain, type, period);
+"""
+
+
+def default_consultant():
+    """Who the fetched entries belong to: GUI full name, else login name."""
+    return (
+        os.getenv("SPRINGAHEAD_FULL_NAME", "").strip()
+        or os.getenv("SPRINGAHEAD_USERNAME", "").strip()
+        or "default"
+    )
+
+
+def connect(db_path=DB_PATH):
+    conn = sqlite3.connect(str(db_path))
+    conn.executescript(SCHEMA)
+    return conn
+
+
+def period_keys(iso_date):
+    """'2025-11-03' -> {'week': '2025-W45', 'month': '2025-11'}"""
+    dt = datetime.strptime(iso_date, "%Y-%m-%d")
+    year, week, _ = dt.isocalendar()
+    return {"week": f"{year}-W{week:02d}", "month": dt.strftime("%Y-%m")}
+
+
+def _apply(conn, consultant, iso_date, project, type_, hours_delta, days_delta):
+    for grain, period in period_keys(iso_date).items():
+        conn.execute(
+            """
+            INSERT INTO rollups (grain, period, consultant, project, type, hours, days)
+            VALUES (?, ?, ?, ?, ?, ?, ?)
+            ON CONFLICT (grain, period, consultant, project, type)
+            DO UPDATE SET hours = hours + excluded.hours, days = days + excluded.days
+            """,
+            (grain, period, consultant, project, type_, hours_delta, days_delta),
+        )
+        if days_delta < 0:
+            conn.execute(
+                "DELETE FROM rollups WHERE grain = ? AND period = ? AND consultant = ? "
+                "AND project = ? AND type = ? AND days <= 0",
+                (grain, period, consultant, project, type_),
+            )
+
+
+def refreshed_span(iso_dates):
+    """
+    (first, last) ISO dates a fetch is authoritative for: the whole weeks
+    (Monday to Sunday) its entries fall in. Step 1 reads full timecard
+    weeks, so a day that dropped to 0 hours - and so has no entry - at the
+    edge of the week is still inside the span.
+    """
+    first = date.fromisoformat(min(iso_dates))
+    last = date.fromisoformat(max(iso_dates))
+    first -= timedelta(days=first.weekday())
+    last += timedelta(days=6 - last.weekday())
+    return first.isoformat(), last.isoformat()
+
+
+def ingest_entries(entries, consultant=None, span=None, db_path=DB_PATH):
+    """
+    Merge Step 1 entries into the database and update the rollups in place.
+
+    The fetched entries are authoritative for the dates they span (by
+    default the weeks they fall in, see refreshed_span(); or an explicit
+    (first, last) ISO date pair): a row for that consultant inside the span
+    that is no longer present is removed (and subtracted from the rollups).
+
+    Returns (added, changed, removed) counts.
+    """
+    consultant = consultant or default_consultant()
+    fetched = {}
+    for entry in entries:
+        iso_date = datetime.strptime(entry["date"], "%m/%d/%Y").strftime("%Y-%m-%d")
+        key = (iso_date, entry.get("project", ""), entry.get("type", ""))
+        fetched[key] = fetched.get(key, 0.0) + float(entry["hours"])
+
+    if not fetched:
+        return 0, 0, 0
+
+    first, last = span or refreshed_span([k[0] for k in fetched])
+    added = changed = removed = 0
+
+    conn = connect(db_path)
+    try:
+        with conn:
+            existing = {
+                (row[0], row[1], row[2]): row[3]
+                for row in conn.execute(
+                    "SELECT date, project, type, hours FROM entries "
+                    "WHERE consultant = ? AND date BETWEEN ? AND ?",
+                    (consultant, first, last),
+                )
+            }
+
+            for key, hours in fetched.items():
+                old = existing.pop(key, None)
+                if old is None:
+                    _apply(conn, consultant, *key, hours, 1)
+                    added += 1
+                elif old != hours:
+                    _apply(conn, consultant, *key, hours - old, 0)
+                    changed += 1
+                else:
+                    continue
+                conn.execute(
+                    "INSERT OR REPLACE INTO entries (consultant, date, project, type, hours) "
+                    "VALUES (?, ?, ?, ?, ?)",
+                    (consultant, *key, hours),
+                )
+
+            for key, old in existing.items():
+                _apply(conn, consultant, *key, -old, -1)
+                conn.execute(
+                    "DELETE FROM entries WHERE consultant = ? AND date = ? "
+                    "AND project = ? AND type = ?",
+                    (consultant, *key),
+                )
+                removed += 1
+    finally:
+        conn.close()
+
+    return added, changed, removed
+
+
+def rebuild(db_path=DB_PATH):
+    """Recompute every rollup from the raw entries (repair / schema changes)."""
+    conn = connect(db_path)
+    try:
+        with conn:
+            conn.execute("DELETE FROM rollups")
+            rows = conn.execute(
+                "SELECT consultant, date, project, type, hours FROM entries"
+            ).fetchall()
+            for consultant, iso_date, project, type_, hours in rows:
+                _apply(conn, consultant, iso_date, project, type_, hours, 1)
+    finally:
+        conn.close()
+    return len(rows)
+
+
+def summarize(grain="month", consultant=None, project=None, type_=None,
+              since=None, until=None, db_path=DB_PATH):
+    """
+    Totals per period, consultant, project and type from the rollup table.
+
+    Returns a list of dicts sorted by period.
+    """
+    if grain not in GRAINS:
+        raise ValueError(f"grain must be one of {GRAINS}, not {grain!r}")
+
+    sql = "SELECT period, consultant, project, type, hours, days FROM rollups WHERE grain = ?"
+    params = [grain]
+    for column, value in (("consultant", consultant), ("project", project), ("type", type_)):
+        if value:
+            sql += f" AND {column} = ?"
+            params.append(value)
+    if since:
+        sql += " AND period >= ?"
+        params.append(since)
+    if until:
+        sql += " AND period <= ?"
+        params.append(until)
+    sql += " ORDER BY period, consultant, project, type"
+
+    conn = connect(db_path)
+    try:
+        return [
+            {
+                "period": period,
+                "consultant": consultant_,
+                "project": project_,
+                "type": type__,
+                "hours": round(hours, 2),
+                "days": days,
+            }
+            for period, consultant_, project_, type__, hours, days in conn.execute(sql, params)
+        ]
+    finally:
+        conn.close()
+
+
+def export_rows(rows, fmt="csv"):
+    if fmt == "json":
+        return json.dumps({"rollups": rows}, indent=2)
+    buffer = io.StringIO()
+    writer = csv.DictWriter(
+        buffer, fieldnames=["period", "consultant", "project", "type", "hours", "days"]
+    )
+    writer.writeheader()
+    writer.writerows(rows)
+    return buffer.getvalue()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="SpringAhead hours rollups.")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p_ingest = sub.add_parser("ingest", help="Add a Step 1 JSON file to the rollups.")
+    p_ingest.add_argument("json", nargs="?", default=str(JSON_PATH))
+    p_ingest.add_argument("--consultant", help="Owner of the entries (default: full name / login).")
+
+    for name, help_text in (("summary", "Print totals."), ("export", "Write totals to CSV/JSON.")):
+        p = sub.add_parser(name, help=help_text)
+        p.add_argument("--grain", choices=GRAINS, default="month")
+        p.add_argument("--consultant")
+        p.add_argument("--project")
+        p.add_argument("--type", dest="type_")
+        p.add_argument("--since", help="First period, e.g. 2025-01 or 2025-W01.")
+        p.add_argument("--until", help="Last period, e.g. 2025-12 or 2025-W52.")
+        if name == "export":
+            p.add_argument("--format", choices=("csv", "json"), default="csv")
+            p.add_argument("--out", help="Output file (default: print to stdout).")
+
+    sub.add_parser("rebuild", help="Recompute all rollups from the stored entries.")
+
+    args = parser.parse_args(argv)
+
+    if args.command == "ingest":
+        with open(args.json, "r", encoding="utf-8") as f:
+            entries = json.load(f).get("entries", [])
+        added, changed, removed = ingest_entries(entries, consultant=args.consultant)
+        print(f"Rollups updated: {added} added, {changed} changed, {removed} removed.")
+        return
+
+    if args.command == "rebuild":
+        print(f"Rebuilt rollups from {rebuild()} stored entries.")
+        return
+
+    rows = summarize(
+        grain=args.grain,
+        consultant=args.consultant,
+        project=args.project,
+        type_=args.type_,
+        since=args.since,
+        until=args.until,
+    )
+
+    if args.command == "export":
+        text = export_rows(rows, args.format)
+        if args.out:
+            Path(args.out).write_text(text, encoding="utf-8", newline="")
+            print(f"Exported {len(rows)} rollup row(s) to {Path(args.out).resolve()}")
+        else:
+            print(text)
+        return
+
+    if not rows:
+        print("No rollups recorded yet.")
+        return
+    for row in rows:
+        print(
+            f"{row['period']} | {row['consultant']} | {row['project']} "
+            f"({row['type']}) | {row['hours']} hours over {row['days']} day(s)"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,203 @@
+"""
+Speculative SpringAhead login for the GUI.
+
+Gooey runs the real work in a child process only after the user presses
+Start, so every run used to pay for a Chromium launch plus the login. With
+this module the GUI process starts a headless Chromium in the background as
+soon as the window opens and, if MyCreds.env / the environment already hold
+complete credentials, logs in (otherwise it just pre-loads the login page).
+
+When the session is ready, its DevTools endpoint is put in the GUI's
+environment, which Gooey passes to the child. In the child,
+adopt_or_cancel() hands it to Step 1 (SPRINGAHEAD_CDP_URL +
+SPRINGAHEAD_CDP_REUSE=1), or closes it when it no longer matches the run:
+different credentials typed into the form, or "Show browser" checked.
+A session is used by at most one run; Step 1 closes it when done.
+
+Set SPRINGAHEAD_SPECULATIVE=0 to turn this off. It is also skipped when
+SPRINGAHEAD_CDP_URL already points at a browser of your own.
+"""
+
+import atexit
+import hashlib
+import os
+import shutil
+import socket
+import sys
+import tempfile
+import threading
+import urllib.request
+from pathlib import Path
+
+from dotenv import dotenv_values
+from playwright.sync_api import sync_playwright
+
+import springahead_step1_fetch as step1
+
+SESSION_ENV = "SPRINGAHEAD_SPECULATIVE_CDP_URL"
+FINGERPRINT_ENV = "SPRINGAHEAD_SPECULATIVE_LOGIN"
+LOGIN_BUDGET_SECONDS = 60
+
+
+def get_app_root() -> Path:
+    if getattr(sys, "frozen", False):
+        return Path(sys.executable).resolve().parent
+    return Path(__file__).resolve().parent
+
+
+APP_ROOT = get_app_root()
+ENV_PATH = APP_ROOT / "MyCreds.env"
+
+
+def speculative_enabled():
+    raw = os.getenv("SPRINGAHEAD_SPECULATIVE", "1").strip().lower()
+    return raw not in ("0", "false", "no", "off")
+
+
+def saved_credentials():
+    """
+    Complete credentials from the environment or MyCreds.env, else None.
+
+    Unlike step1.load_credentials() this never prompts.
+    """
+    keys = ("SPRINGAHEAD_COMPANY", "SPRINGAHEAD_USERNAME", "SPRINGAHEAD_PASSWORD")
+    file_values = dotenv_values(ENV_PATH) if ENV_PATH.exists() else {}
+    values = [os.getenv(key) or file_values.get(key) or "" for key in keys]
+    if not all(values):
+        return None
+    return dict(zip(("company", "username", "password"), values))
+
+
+def credentials_fingerprint(creds):
+    """Hash of the credentials, so the password itself never goes into the environment."""
+    if not creds:
+        return ""
+    raw = "\0".join((creds["company"], creds["username"], creds["password"]))
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+def _free_port():
+    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+class SpeculativeSession(threading.Thread):
+    """
+    Background browser + login in the GUI process.
+
+    Playwright's sync API is tied to the thread that started it, so the
+    whole session lives in this thread until stop().
+    """
+
+    def __init__(self):
+        super().__init__(name="springahead-speculative", daemon=True)
+        self.ready = threading.Event()
+        self.error = None
+        self._stop_requested = threading.Event()
+
+    def run(self):
+        user_data_dir = tempfile.mkdtemp(prefix="springahead_speculative_")
+        port = _free_port()
+        try:
+            with sync_playwright() as p:
+                context = p.chromium.launch_persistent_context(
+                    user_data_dir,
+                    headless=True,
+                    args=[f"--remote-debugging-port={port}"],
+                )
+                try:
+                    page = context.pages[0] if context.pages else context.new_page()
+                    creds = saved_credentials()
+                    deadline = step1.Deadline(LOGIN_BUDGET_SECONDS)
+                    if creds:
+                        step1._login(page, creds, deadline)
+                    else:
+                        page.goto(
+                            step1.LOGIN_URL,
+                            wait_until="domcontentloaded",
+                            timeout=deadline.remaining_ms(30000),
+                        )
+
+                    os.environ[FINGERPRINT_ENV] = credentials_fingerprint(creds)
+                    os.environ[SESSION_ENV] = f"http://127.0.0.1:{port}"
+                    self.ready.set()
+                    self._stop_requested.wait()
+                finally:
+                    os.environ.pop(SESSION_ENV, None)
+                    try:
+                        context.close()
+                    except Exception:
+                        # Step 1 already closed the browser it adopted
+                        pass
+        except Exception as e:
+            # Best effort: the run simply starts its own browser
+            self.error = e
+        finally:
+            shutil.rmtree(user_data_dir, ignore_errors=True)
+
+    def stop(self, timeout=10):
+        self._stop_requested.set()
+        self.join(timeout)
+
+
+def start_in_background():
+    """Start a speculative session for this GUI process (or return None)."""
+    if not speculative_enabled() or step1.get_cdp_url():
+        return None
+    session = SpeculativeSession()
+    session.start()
+    atexit.register(session.stop)
+    return session
+
+
+# ---------- Child process side ----------
+
+
+def _endpoint_alive(cdp_url):
+    try:
+        with urllib.request.urlopen(cdp_url.rstrip("/") + "/json/version", timeout=1):
+            return True
+    except Exception:
+        return False
+
+
+def close_remote_browser(cdp_url):
+    try:
+        with sync_playwright() as p:
+            browser = p.chromium.connect_over_cdp(cdp_url)
+            try:
+                browser.new_browser_cdp_session().send("Browser.close")
+            finally:
+                browser.close()
+    except Exception as e:
+        print(f"[WARN] Could not close the pre-started browser: {e}")
+
+
+def adopt_or_cancel(headless):
+    """
+    In the Step 1 process: hand the GUI's speculative session to Step 1,
+    or close it if it doesn't match this run. Returns True if adopted.
+
+    Call after the GUI's credential overrides are in the environment.
+    """
+    cdp_url = os.environ.pop(SESSION_ENV, "")
+    fingerprint = os.environ.pop(FINGERPRINT_ENV, "")
+    if not cdp_url or step1.get_cdp_url() or not _endpoint_alive(cdp_url):
+        return False
+
+    reason = None
+    if not headless:
+        reason = "the browser window was requested"
+    elif fingerprint and fingerprint != credentials_fingerprint(saved_credentials()):
+        reason = "the credentials changed"
+
+    if reason:
+        print(f"Discarding the pre-started SpringAhead session ({reason}).")
+        close_remote_browser(cdp_url)
+        return False
+
+    os.environ["SPRINGAHEAD_CDP_URL"] = cdp_url
+    os.environ["SPRINGAHEAD_CDP_REUSE"] = "1"
+    print("Using the SpringAhead session started while the form was open.")
+    return True
@@ -15,17 +15,52 @@ Behavior:
     - Logs into SpringAhead, clicks "Add Time",
       scrapes current week's days with hours > 0,
       and prints them + saves to JSON.
+    - If SPRINGAHEAD_CDP_URL is set, attaches to that running Chromium
+      instead of launching a new one (the browser is left running).
+      With SPRINGAHEAD_CDP_REUSE=1 it takes over that browser's existing
+      page and session instead (used for the GUI's pre-started login, see
+      springahead_speculative.py) and closes the browser when done.
+    - If SPRINGAHEAD_SNAPSHOT=1, saves the List view HTML under snapshots/
+      (replay it with springahead_timecard_parser.py).
+    - If SPRINGAHEAD_CAPTURE=network, reads the timecard from the page's
+      own JSON data responses (List view scrape is the fallback).
+    - Each login/navigation step races its success condition against known
+      failures (invalid login banner, bounce back to the login page,
+      maintenance page) under one SPRINGAHEAD_DEADLINE budget (seconds).
+    - If SPRINGAHEAD_ROLLUPS=1, updates the hours rollups database
+      (see springahead_rollups.py).
+    - If SPRINGAHEAD_BROWSER_PROFILE=1, launches Chromium on a persistent
+      profile so static assets come from the HTTP cache on later runs
+      (see springahead_browser_profile.py). Cache hit rate and bytes
+      transferred are logged at the end of the run.
+    - If SPRINGAHEAD_WEEKS=N (N > 1), also fetches the N-1 previous weeks,
+      each in its own tab of the same logged-in context, and merges them.
 """
 
 import os
 from pathlib import Path
 from getpass import getpass
 import json
+import re
 import sys
+import time
+from datetime import datetime
 
-from playwright.sync_api import sync_playwright, TimeoutError as PlaywrightTimeoutError
+from playwright.sync_api import sync_playwright
 from dotenv import load_dotenv
 
+import springahead_browser_profile as browser_profile
+import springahead_memory as memory
+import springahead_progress as progress
+import springahead_rollups as rollups
+from springahead_timecard_parser import (
+    entries_from_payload,
+    entry_from_cells,
+    merge_entries,
+    save_snapshot,
+    snapshot_stamp,
+)
+
 def get_app_root() -> Path:
     if getattr(sys, "frozen", False):
         return Path(sys.executable).resolve().parent
@@ -36,6 +71,15 @@ LOGIN_URL = (
     "?ReturnUrl=%2Fvt%2Fgo%3FHome%26tokenid%3Dvte"
 )
 
+LOGIN_PATH = "/go/Account/Logon"
+INVALID_LOGIN_TEXT = "Login information entered is invalid. Please try again."
+MAINTENANCE_RE = re.compile(r"down for maintenance|scheduled maintenance|temporarily unavailable", re.I)
+# "Previous week" arrow on the timecard; override with SPRINGAHEAD_PREV_WEEK_SELECTOR
+PREV_WEEK_SELECTOR = 'a[title*="Previous" i], button[title*="Previous" i]'
+# JSON responses read by SPRINGAHEAD_CAPTURE=network must come from a URL
+# matching this; override with SPRINGAHEAD_CAPTURE_URL_PATTERN
+CAPTURE_URL_PATTERN = r"(?i)time(card|day|entr|sheet)"
+
 APP_ROOT = get_app_root()
 ENV_PATH = APP_ROOT / "MyCreds.env"
 OUTPUT_JSON = APP_ROOT / "springahead_current_week.json"
@@ -99,119 +143,591 @@ def load_credentials():
         "password": password,
     }
 
-def fetch_worked_days(creds, headless=True):
-    results = []
+def get_cdp_url():
+    """
+    DevTools endpoint of an already-running Chromium to attach to, if any.
 
-    with sync_playwright() as p:
-        browser = p.chromium.launch(headless=headless)
-        page = browser.new_page()
+    Set SPRINGAHEAD_CDP_URL (e.g. http://localhost:9222) to reuse a resident
+    browser instead of launching a fresh one for every run.
+    """
+    return os.getenv("SPRINGAHEAD_CDP_URL", "").strip() or None
+
+
+def reuse_session_enabled():
+    """SPRINGAHEAD_CDP_REUSE=1: adopt the CDP browser's existing page and login."""
+    raw = os.getenv("SPRINGAHEAD_CDP_REUSE", "0").strip().lower()
+    return raw in ("1", "true", "yes", "on")
+
+
+def snapshots_enabled():
+    """SPRINGAHEAD_SNAPSHOT=1 saves a compressed List view snapshot per run."""
+    raw = os.getenv("SPRINGAHEAD_SNAPSHOT", "0").strip().lower()
+    return raw in ("1", "true", "yes", "on")
+
+
+def rollups_enabled():
+    """SPRINGAHEAD_ROLLUPS=1 feeds every fetch into the hours rollups database."""
+    raw = os.getenv("SPRINGAHEAD_ROLLUPS", "0").strip().lower()
+    return raw in ("1", "true", "yes", "on")
+
+
+def open_browser_page(p, headless=True, cdp_url=None, profile_dir=None, reuse=False):
+    """
+    Return (page, close) for Step 1.
+
+    - Default: launch a new Chromium; close() shuts it down.
+    - With cdp_url: attach over the DevTools protocol and open our own
+      context in that browser; close() only closes that context and
+      disconnects, leaving the browser running for the next run.
+    - With cdp_url and reuse: take over the browser's default context and
+      its open page (keeping any login already done there); close() shuts
+      that browser down, since its session is single-use.
+    - With profile_dir: launch Chromium on that persistent profile so its
+      HTTP cache is reused; cookies are cleared so the run logs in fresh.
+    """
+    if cdp_url:
+        print(f"Attaching to running browser at {cdp_url}...")
+        browser = p.chromium.connect_over_cdp(cdp_url)
+
+        if reuse and browser.contexts:
+            context = browser.contexts[0]
+            page = context.pages[0] if context.pages else context.new_page()
+
+            def close():
+                try:
+                    browser.new_browser_cdp_session().send("Browser.close")
+                except Exception:
+                    # Already gone
+                    pass
+                browser.close()
+
+            return page, close
+
+        context = browser.new_context()
+        page = context.new_page()
+
+        def close():
+            context.close()
+            browser.close()  # disconnect only; we didn't launch it
+
+        return page, close
+
+    if profile_dir:
+        browser_profile.enforce_size_cap(profile_dir)
+        context = p.chromium.launch_persistent_context(
+            str(profile_dir),
+            headless=headless,
+            args=browser_profile.launch_args(),
+        )
+        context.clear_cookies()
+        page = context.pages[0] if context.pages else context.new_page()
+        return page, context.close
+
+    browser = p.chromium.launch(headless=headless)
+    page = browser.new_page()
+    return page, browser.close
+
+
+def get_capture_mode():
+    """
+    How Step 1 reads the timecard, from SPRINGAHEAD_CAPTURE:
+      - "dom" (default): switch to List view and scrape the table
+      - "network": read the timecard's own JSON data responses, falling
+        back to the List view scrape when none is recognized
+    """
+    raw = os.getenv("SPRINGAHEAD_CAPTURE", "dom").strip().lower()
+    return "network" if raw == "network" else "dom"
 
-        print("Opening login page...")
-        page.goto(LOGIN_URL, wait_until="domcontentloaded")
 
-        # --- LOGIN ---
-        print("Filling login form...")
+def get_capture_url_pattern():
+    raw = os.getenv("SPRINGAHEAD_CAPTURE_URL_PATTERN", "").strip() or CAPTURE_URL_PATTERN
+    try:
+        return re.compile(raw)
+    except re.error as e:
+        raise RuntimeError(f"SPRINGAHEAD_CAPTURE_URL_PATTERN is not a valid regex: {e}") from e
 
-        # Scope to the main login form only
-        page.wait_for_selector("#login_body input#CompanyLogin", timeout=15000)
-        page.wait_for_selector("#login_body input#UserName", timeout=15000)
-        page.wait_for_selector("#login_body input#Password", timeout=15000)
 
-        page.locator("#login_body input#CompanyLogin").fill(creds["company"])
-        page.locator("#login_body input#UserName").fill(creds["username"])
-        page.locator("#login_body input#Password").fill(creds["password"])
+def get_week_count():
+    """How many timecard weeks to fetch (SPRINGAHEAD_WEEKS, default 1 = current only)."""
+    raw = os.getenv("SPRINGAHEAD_WEEKS", "").strip()
+    try:
+        return max(1, int(raw)) if raw else 1
+    except ValueError:
+        return 1
 
-        page.get_by_role("button", name="Log In").click()
-        
-        # give the page a moment to redraw after login
-        page.wait_for_load_state("networkidle")
 
-        # Look for login-error banner
-        # Use the visible text from the page; no extra quotes needed
-        error_banner = page.locator("text=Login information entered is invalid. Please try again.")
+def get_prev_week_selector():
+    return os.getenv("SPRINGAHEAD_PREV_WEEK_SELECTOR", "").strip() or PREV_WEEK_SELECTOR
 
-        if error_banner.is_visible():
-            # Optional: screenshot for debugging
-            page.screenshot(path="springahead_login_error.png", full_page=True)
 
-            raise RuntimeError(
-                "SpringAhead login failed: login information is invalid. "
-                "Please check your company, username, or password (MyCreds.env / GUI)."
+class TimecardResponseCollector:
+    """
+    Collect JSON responses the page receives and look for timecard records.
+
+    Only responses from timecard endpoints (url_pattern, default
+    get_capture_url_pattern()) are considered. The response listener only
+    queues them; bodies are read from the main flow in wait_for_entries(),
+    not inside the event callback.
+    """
+
+    def __init__(self, page, url_pattern=None):
+        self.page = page
+        self.url_pattern = url_pattern or get_capture_url_pattern()
+        self._pending = []
+        page.on("response", self._on_response)
+
+    def _on_response(self, response):
+        content_type = response.headers.get("content-type", "")
+        if "json" in content_type.lower() and self.url_pattern.search(response.url):
+            self._pending.append(response)
+
+    def wait_for_entries(self, timeout_ms):
+        """
+        Return entries from the first response holding timecard records,
+        or None if none arrived within timeout_ms.
+        """
+        deadline = time.monotonic() + timeout_ms / 1000
+        while True:
+            while self._pending:
+                response = self._pending.pop(0)
+                try:
+                    payload = response.json()
+                except Exception:
+                    continue
+                entries = entries_from_payload(payload)
+                if entries is not None:
+                    print(f"Timecard data captured from {response.url}")
+                    return entries
+
+            if time.monotonic() >= deadline:
+                return None
+            self.page.wait_for_timeout(100)
+
+    def stop(self):
+        self.page.remove_listener("response", self._on_response)
+
+
+class Deadline:
+    """One overall time budget for a Step 1 run (SPRINGAHEAD_DEADLINE, seconds)."""
+
+    def __init__(self, seconds):
+        self.seconds = seconds
+        self.expires_at = time.monotonic() + seconds
+
+    def remaining_ms(self, cap_ms=None):
+        """
+        Milliseconds left, optionally capped by a per-step timeout.
+
+        Never 0: Playwright treats timeout=0 as "wait forever".
+        """
+        remaining = max(1, int((self.expires_at - time.monotonic()) * 1000))
+        return remaining if cap_ms is None else min(remaining, cap_ms)
+
+    def expired(self):
+        return time.monotonic() >= self.expires_at
+
+
+def get_deadline_seconds():
+    raw = os.getenv("SPRINGAHEAD_DEADLINE", "").strip()
+    try:
+        return float(raw) if raw else 120.0
+    except ValueError:
+        return 120.0
+
+
+def race(page, outcomes, deadline, timeout_ms, poll_ms=100):
+    """
+    Wait until the first of several page conditions holds.
+
+    outcomes: list of (name, check) where check() returns True once that
+    outcome is visible. Checks are non-blocking (is_visible, page.url), so
+    failures are reported as soon as they render instead of after a full
+    success timeout. Returns the winning name, or None when timeout_ms (or
+    the run's overall deadline) runs out.
+    """
+    limit = time.monotonic() + deadline.remaining_ms(timeout_ms) / 1000
+    while True:
+        for name, check in outcomes:
+            try:
+                if check():
+                    return name
+            except Exception:
+                # Page navigating mid-check; try again on the next poll
+                continue
+        if time.monotonic() >= limit:
+            return None
+        page.wait_for_timeout(poll_ms)
+
+
+def _maintenance_visible(page):
+    return page.get_by_text(MAINTENANCE_RE).first.is_visible()
+
+
+def _raise_maintenance(page):
+    page.screenshot(path="springahead_maintenance.png", full_page=True)
+    raise RuntimeError(
+        "SpringAhead appears to be unavailable (maintenance page shown). "
+        "Please try again later."
+    )
+
+
+def fetch_worked_days(creds, headless=True, cdp_url=None, capture="dom", deadline=None,
+                      profile_dir=None, weeks=1, reuse=False):
+    """
+    Log in and return the worked days on the current timecard.
+
+    weeks > 1 also fetches the previous weeks in parallel tabs (List view
+    scrape only) and returns the merged, sorted entries.
+    """
+    results = []
+    deadline = deadline or Deadline(get_deadline_seconds())
+
+    with sync_playwright() as p:
+        with progress.phase("browser"):
+            page, close_browser = open_browser_page(
+                p, headless=headless, cdp_url=cdp_url, profile_dir=profile_dir, reuse=reuse
             )
 
-        # --- HOME PAGE (Add Time) ---
         try:
-            page.get_by_text("Add Time", exact=True).wait_for(timeout=15000)
-        except PlaywrightTimeoutError:
-            browser.close()
-            raise RuntimeError(
-                "Could not find 'Add Time' after logging in. "
-                "Check credentials or if the UI changed."
-            )
+            cache_stats = browser_profile.CacheStats(page)
+        except Exception as e:
+            print(f"Browser cache statistics unavailable: {e}")
+            cache_stats = None
+
+        try:
+            with progress.phase("login"):
+                _login(page, creds, deadline)
+
+            if weeks > 1:
+                with progress.phase("timecard"):
+                    pages = _open_timecard_weeks(page, deadline, weeks)
+                try:
+                    stamp = snapshot_stamp()
+                    with progress.phase("scrape"):
+                        results = merge_entries(
+                            _scrape_list_view(tab, stamp=stamp, label=f"week{i + 1}")
+                            for i, tab in enumerate(pages)
+                        )
+                finally:
+                    # A reused (CDP) browser outlives this run; don't leave tabs in it
+                    _close_tabs(pages[1:])
+            else:
+                with progress.phase("timecard"):
+                    results = _open_timecard(page, deadline, capture=capture)
+
+                if results is None:
+                    with progress.phase("scrape"):
+                        results = _scrape_list_view(page)
+        finally:
+            if cache_stats is not None:
+                print(cache_stats.summary())
+                cache_stats.stop()
+            close_browser()
+
+    return results
+
+
+def _probe_reused_session(page, deadline):
+    """
+    Where a reused browser page really stands: "home", "login_page",
+    "maintenance" or None (anything else, e.g. a blank tab).
 
+    A page showing "Add Time" may have sat behind the GUI form long enough
+    for the server session to expire, so it is reloaded before it's trusted.
+    """
+    try:
+        if not page.get_by_text("Add Time", exact=True).is_visible():
+            return "login_page" if LOGIN_PATH.lower() in page.url.lower() else None
+        page.reload(wait_until="domcontentloaded", timeout=deadline.remaining_ms(30000))
+        return race(
+            page,
+            [
+                ("home", page.get_by_text("Add Time", exact=True).is_visible),
+                ("login_page", lambda: LOGIN_PATH.lower() in page.url.lower()),
+                ("maintenance", lambda: _maintenance_visible(page)),
+            ],
+            deadline,
+            timeout_ms=15000,
+        )
+    except Exception:
+        return None
+
+
+def _login(page, creds, deadline):
+    # A reused browser session may already be logged in, or sitting on the
+    # login page it pre-loaded
+    state = _probe_reused_session(page, deadline)
+    if state == "home":
+        print("Already logged in; reusing the browser session.")
+        return
+    if state == "maintenance":
+        _raise_maintenance(page)
+
+    if state == "login_page":
+        print("Login page already open.")
+    else:
+        print("Opening login page...")
+        page.goto(LOGIN_URL, wait_until="domcontentloaded", timeout=deadline.remaining_ms(30000))
+
+    # --- LOGIN ---
+    print("Filling login form...")
+
+    # Scope to the main login form only
+    company_input = page.locator("#login_body input#CompanyLogin")
+    username_input = page.locator("#login_body input#UserName")
+    password_input = page.locator("#login_body input#Password")
+
+    outcome = race(
+        page,
+        [
+            ("form", lambda: company_input.is_visible()
+                and username_input.is_visible()
+                and password_input.is_visible()),
+            ("maintenance", lambda: _maintenance_visible(page)),
+        ],
+        deadline,
+        timeout_ms=15000,
+    )
+    if outcome == "maintenance":
+        _raise_maintenance(page)
+    if outcome is None:
+        raise RuntimeError("SpringAhead login form did not load.")
+
+    company_input.fill(creds["company"])
+    username_input.fill(creds["username"])
+    password_input.fill(creds["password"])
+
+    page.get_by_role("button", name="Log In").click()
+
+    # Race the home page against every known way the login can fail, so a
+    # bad password is reported as soon as the banner shows up.
+    # Use the visible text from the page; no extra quotes needed
+    error_banner = page.locator(f"text={INVALID_LOGIN_TEXT}")
+    add_time = page.get_by_text("Add Time", exact=True)
+
+    def back_on_login_page():
+        # After a rejected post-back the form comes back with an empty password
+        return (
+            LOGIN_PATH.lower() in page.url.lower()
+            and password_input.is_visible()
+            and password_input.input_value() == ""
+        )
+
+    outcome = race(
+        page,
+        [
+            ("home", add_time.is_visible),
+            ("invalid", error_banner.is_visible),
+            ("maintenance", lambda: _maintenance_visible(page)),
+            ("login_page", back_on_login_page),
+        ],
+        deadline,
+        timeout_ms=15000,
+    )
+
+    if outcome == "invalid":
+        # Optional: screenshot for debugging
+        page.screenshot(path="springahead_login_error.png", full_page=True)
+
+        raise RuntimeError(
+            "SpringAhead login failed: login information is invalid. "
+            "Please check your company, username, or password (MyCreds.env / GUI)."
+        )
+    if outcome == "maintenance":
+        _raise_maintenance(page)
+    if outcome == "login_page":
+        page.screenshot(path="springahead_login_error.png", full_page=True)
+        raise RuntimeError(
+            "SpringAhead sent us back to the login page without an error message. "
+            "Please check your company, username, or password (MyCreds.env / GUI)."
+        )
 
-        print("Clicking 'Add Time' to open current timecard...")
-        page.get_by_text("Add Time", exact=True).click()
+    # --- HOME PAGE (Add Time) ---
+    if outcome is None:
+        raise RuntimeError(
+            "Could not find 'Add Time' after logging in. "
+            "Check credentials or if the UI changed."
+        )
 
-        # --- TIME ENTRY PAGE ---
+
+def _open_timecard(page, deadline, capture="dom"):
+    """
+    Open the current timecard.
+
+    With capture="network", returns the entries read from the timecard's
+    data responses as soon as one is recognized. Otherwise (or when no
+    payload shows up) switches to List view and returns None, so the caller
+    scrapes the table.
+    """
+    collector = TimecardResponseCollector(page) if capture == "network" else None
+
+    print("Clicking 'Add Time' to open current timecard...")
+    page.get_by_text("Add Time", exact=True).click()
+
+    if collector is not None:
         try:
-            page.get_by_text("Enter Time for", exact=False).wait_for(timeout=15000)
-        except PlaywrightTimeoutError:
-            browser.close()
-            raise RuntimeError(
-                "Time entry page did not load (no 'Enter Time for' found)."
-            )
+            entries = collector.wait_for_entries(timeout_ms=deadline.remaining_ms(15000))
+        finally:
+            collector.stop()
+        if entries is not None:
+            return entries
+        print("No timecard data response recognized; falling back to the List view scrape.")
+
+    # --- TIME ENTRY PAGE ---
+    _wait_for_timecard_page(page, deadline)
+
+    # Optional: visual delay so the UI actually fully loads
+    page.wait_for_timeout(3000)
+    # --- Switch to List view (Week view loads by default with no cookies) ---
+    print("Switching to List view...")
+    page.get_by_text("List", exact=True).click()
+    page.wait_for_timeout(3000)
+
+    print("Waiting for timecard table to load...")
+    page.wait_for_selector("table.timedayTable", timeout=deadline.remaining_ms(20000))
+    return None
+
+
+def _wait_for_timecard_page(page, deadline):
+    enter_time = page.get_by_text("Enter Time for", exact=False)
+    outcome = race(
+        page,
+        [
+            ("timecard", enter_time.is_visible),
+            ("maintenance", lambda: _maintenance_visible(page)),
+            ("logged_out", lambda: LOGIN_PATH.lower() in page.url.lower()),
+        ],
+        deadline,
+        timeout_ms=15000,
+    )
+    if outcome == "maintenance":
+        _raise_maintenance(page)
+    if outcome == "logged_out":
+        raise RuntimeError(
+            "SpringAhead session ended while opening the timecard "
+            "(redirected to the login page). Please run again."
+        )
+    if outcome is None:
+        raise RuntimeError(
+            "Time entry page did not load (no 'Enter Time for' found)."
+        )
 
-        # Optional: visual delay so the UI actually fully loads
-        page.wait_for_timeout(3000)
-        # --- Switch to List view (Week view loads by default with no cookies) ---
-        print("Switching to List view...")
-        page.get_by_text("List", exact=True).click()
-        page.wait_for_timeout(3000)
 
-        print("Waiting for timecard table to load...")
-        page.wait_for_selector("table.timedayTable", timeout=20000)
+def _open_timecard_weeks(page, deadline, weeks):
+    """
+    Open the current timecard plus weeks-1 previous ones, one tab each.
+
+    Tabs share the logged-in context. Only the first "Add Time" navigation
+    runs alone (it gives the timecard URL); after that each step is started
+    on every tab before waiting on any of them, so the page loads overlap
+    and N weeks take about as long as the furthest one. Returns the pages
+    (current week first), each in List view; the caller closes the extra
+    tabs (they're closed here if opening fails).
+    """
+    print("Clicking 'Add Time' to open current timecard...")
+    page.get_by_text("Add Time", exact=True).click()
+    _wait_for_timecard_page(page, deadline)
+    timecard_url = page.url
+
+    tabs = []
+    try:
+        print(f"Opening {weeks - 1} previous week(s) in parallel tabs...")
+        for _ in range(weeks - 1):
+            tab = page.context.new_page()
+            tabs.append(tab)
+            tab.goto(timecard_url, wait_until="commit", timeout=deadline.remaining_ms(30000))
+        # The current week switches to List view while the other tabs load
+        page.get_by_text("List", exact=True).click(no_wait_after=True)
+        for tab in tabs:
+            _wait_for_timecard_page(tab, deadline)
+        _go_back_weeks(tabs, deadline)
+
+        for tab in tabs:
+            tab.get_by_text("List", exact=True).click(no_wait_after=True)
+        for tab in [page] + tabs:
+            tab.wait_for_selector("table.timedayTable", timeout=deadline.remaining_ms(20000))
+    except Exception:
+        _close_tabs(tabs)
+        raise
+
+    return [page] + tabs
+
+
+def _close_tabs(tabs):
+    for tab in tabs:
+        try:
+            tab.close()
+        except Exception:
+            pass
+
+
+def _go_back_weeks(tabs, deadline):
+    """Move tab i back i + 1 weeks, one round of "previous" clicks per week."""
+    selector = get_prev_week_selector()
+    for step in range(1, len(tabs) + 1):
+        moving = tabs[step - 1:]
+        headers = []
+        for tab in moving:
+            header = tab.get_by_text("Enter Time for", exact=False).first
+            headers.append((tab, header, header.inner_text()))
+            prev_week = tab.locator(selector).first
+            if not prev_week.is_visible():
+                raise RuntimeError(
+                    f"Could not find the previous-week control ({selector}). "
+                    "Set SPRINGAHEAD_PREV_WEEK_SELECTOR to match the timecard page."
+                )
+            prev_week.click(no_wait_after=True)
+
+        for tab, header, before in headers:
+            outcome = race(
+                tab,
+                [
+                    ("changed", lambda: header.inner_text() != before),
+                    ("maintenance", lambda: _maintenance_visible(tab)),
+                ],
+                deadline,
+                timeout_ms=20000,
+            )
+            if outcome == "maintenance":
+                _raise_maintenance(tab)
+            if outcome is None:
+                raise RuntimeError(f"Previous timecard week did not load (still '{before}').")
 
-        print("Scraping worked days from the timecard...")
 
-        rows = page.locator("table.timedayTable tr.timeRow")
-        row_count = rows.count()
-        print(f"Found {row_count} time row(s) on the page.")
+def _scrape_list_view(page, stamp=None, label=None):
+    results = []
 
-        for i in range(row_count):
-            row = rows.nth(i)
+    if snapshots_enabled():
+        # Keep the raw List view so the parse can be replayed offline
+        snapshot_path = save_snapshot(page.content(), stamp=stamp, label=label)
+        print(f"Saved timecard snapshot to {snapshot_path}")
 
-            date_text = row.locator(".timedayDate").inner_text().strip()
-            project_text = row.locator("span.timedayProject").inner_text().strip()
-            type_text = row.locator("td.timedayType .timedayType").inner_text().strip()
-            hours_text = row.locator("td.timedayHours").inner_text().strip()
+    print("Scraping worked days from the timecard...")
 
-            if not hours_text:
-                continue
+    rows = page.locator("table.timedayTable tr.timeRow")
+    row_count = rows.count()
+    print(f"Found {row_count} time row(s) on the page.")
+    progress.advance("scrape", 0, row_count)
 
-            try:
-                hours_val = float(hours_text)
-            except ValueError:
-                print(f"Skipping row with non-numeric hours: {hours_text!r}")
-                continue
+    for i in range(row_count):
+        row = rows.nth(i)
 
-            if hours_val <= 0:
-                continue
+        date_text = row.locator(".timedayDate").inner_text().strip()
+        project_text = row.locator("span.timedayProject").inner_text().strip()
+        type_text = row.locator("td.timedayType .timedayType").inner_text().strip()
+        hours_text = row.locator("td.timedayHours").inner_text().strip()
 
-            entry = {
-                "date": date_text,
-                "hours": hours_val,
-                "project": project_text,
-                "type": type_text,
-            }
-            results.append(entry)
+        progress.advance("scrape", i + 1, row_count)
 
-        browser.close()
+        entry = entry_from_cells(date_text, project_text, type_text, hours_text)
+        if entry is not None:
+            results.append(entry)
 
     return results
 
 
 def main():
+    memory.install_if_enabled()
     creds = load_credentials()
 
     # Decide headless mode from env (default: headless ON)
@@ -223,7 +739,15 @@ def main():
     raw = os.getenv("SPRINGAHEAD_HEADLESS", "1").strip().lower()
     headless = raw not in ("0", "false", "no", "off")
 
-    worked_days = fetch_worked_days(creds, headless=headless)
+    worked_days = fetch_worked_days(
+        creds,
+        headless=headless,
+        cdp_url=get_cdp_url(),
+        capture=get_capture_mode(),
+        profile_dir=browser_profile.PROFILE_DIR if browser_profile.profile_enabled() else None,
+        weeks=get_week_count(),
+        reuse=reuse_session_enabled(),
+    )
 
     if not worked_days:
         print("No worked days with hours > 0 found on this timecard.")
@@ -237,6 +761,9 @@ def main():
     OUTPUT_JSON.write_text(json.dumps(data, indent=2), encoding="utf-8")
     print(f"\nSaved data to {OUTPUT_JSON.resolve()}")
 
+    if rollups_enabled():
+        added, changed, removed = rollups.ingest_entries(worked_days)
+        print(f"Hours rollups updated: {added} added, {changed} changed, {removed} removed.")
 
 
 if __name__ == "__main__":
@@ -9,6 +9,9 @@ Requirements:
     Cross-platform path (.xlsx only):
         pip install openpyxl
 
+    Direct .xlsx patching (SPRINGAHEAD_XLSX_BACKEND=patch):
+        no extra packages (see springahead_xlsx_patch.py)
+
 Files expected in the same folder as this script:
     - springahead_current_week.json   (output of Step 1)
     - INVOICE (Template).xlsx         (your invoice template)
@@ -20,8 +23,19 @@ import calendar
 import re
 import sys
 from datetime import datetime, timedelta
-import subprocess
 import shutil
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import springahead_invoice_ledger as invoice_ledger
+import springahead_invoice_numbers as invoice_numbers
+import springahead_memory as memory
+import springahead_progress as progress
+import springahead_supervisor as supervisor
+from springahead_xlsx_patch import XlsxTemplate
 
 # -------- Platform detection --------
 IS_WINDOWS = sys.platform.startswith("win")
@@ -38,14 +52,9 @@ if IS_WINDOWS:
 # openpyxl is used for the portable backend
 try:
     from openpyxl import load_workbook
-except ImportError as e:
-    # On Windows we can still run via COM; on non-Windows we *require* openpyxl
-    if not IS_WINDOWS:
-        raise RuntimeError(
-            "openpyxl is required to run the invoice step on this platform.\n\n"
-            "Install it with:\n    pip install openpyxl"
-        ) from e
-    # On Windows, COM path might still work, so we don't hard-fail here
+except ImportError:
+    # On Windows we can still run via COM, and the patch backend needs no
+    # third-party packages; run_step2_portable() reports the missing package.
     load_workbook = None  # type: ignore
 
 
@@ -174,18 +183,21 @@ def compute_time_blocks(total_hours):
     )
 
 
-def resolve_consultant_name(get_cell_value, set_cell_value):
+def resolve_consultant_name(get_cell_value, set_cell_value, full_name=None):
     """
     Shared logic for resolving the consultant name.
 
     get_cell_value / set_cell_value are backend-specific callables
     operating on Excel cell B6.
+
+    full_name: explicit name from the caller (e.g. one pipeline job); takes
+    the same priority as the SPRINGAHEAD_FULL_NAME env var.
     """
     existing_name = get_cell_value() or ""
     existing_name = str(existing_name).strip()
 
-    # First priority: env var (set by GUI)
-    full_name_env = os.getenv("SPRINGAHEAD_FULL_NAME", "").strip()
+    # First priority: explicit name, then env var (set by GUI)
+    full_name_env = (full_name or os.getenv("SPRINGAHEAD_FULL_NAME", "")).strip()
 
     if full_name_env:
         full_name_input = full_name_env
@@ -215,22 +227,122 @@ def resolve_consultant_name(get_cell_value, set_cell_value):
     return parse_consultant_name(full_name_input)
 
 
+# ---------- Invoice layout (shared by all backends) ----------
+
+FIRST_DATA_ROW = 9
+LAST_DATA_ROW = 38
+TASK_DESCRIPTION = "Remote IT Support"
+
+
+def next_invoice_number(current_number):
+    """Invoice number in E4 plus one; empty or non-numeric cells count as 0."""
+    if current_number is None:
+        current_number = 0
+    try:
+        current_number = int(current_number)
+    except Exception:
+        current_number = 0
+    return current_number + 1
+
+
+def assign_invoice_number(current_number, full_name, period_str):
+    """
+    Invoice number for this run.
+
+    With SPRINGAHEAD_INVOICE_ALLOCATOR=1 the number comes from the shared
+    allocator (safe for concurrent runs; E4 only seeds it once). Otherwise
+    it's the template's E4 plus one, as before.
+    """
+    if invoice_numbers.allocator_enabled():
+        return invoice_numbers.allocate_invoice_number(
+            full_name, period_str, template_number=current_number
+        )
+    return next_invoice_number(current_number)
+
+
+def record_in_ledger(invoice_number, full_name, short_name, period_str, entries,
+                     xlsx_path=None, pdf_path=None):
+    """Add the invoice to the ledger; a ledger problem never fails Step 2."""
+    if not invoice_ledger.ledger_enabled():
+        return
+    try:
+        invoice_ledger.record_invoice(
+            invoice_number, full_name, short_name, period_str, entries,
+            xlsx_path=xlsx_path, pdf_path=pdf_path,
+        )
+    except Exception as e:
+        print(f"[WARN] Could not record the invoice in the ledger: {e}")
+
+
+def attach_pdf_in_ledger(xlsx_path, pdf_path):
+    """Record a PDF made later from an already recorded .xlsx invoice."""
+    if not invoice_ledger.ledger_enabled():
+        return
+    try:
+        invoice_ledger.attach_pdf(xlsx_path, pdf_path)
+    except Exception as e:
+        print(f"[WARN] Could not record the PDF in the ledger: {e}")
+
+
+def build_invoice_rows(entries):
+    """
+    Lay out the A–D detail rows (rows 9–38) for the entries.
+
+    Each worked day takes two rows (morning + afternoon block). Returns a list
+    of (row_number, (date, from, to, task)) tuples; entries that don't fit in
+    the template are dropped with a warning.
+    """
+    rows = []
+    current_row = FIRST_DATA_ROW
+
+    for index, entry in enumerate(entries, start=1):
+        if current_row + 1 > LAST_DATA_ROW:
+            print("Warning: not enough rows in template to fit all entries.")
+            break
+
+        date_str = entry["date"]  # e.g. "11/2/2025"
+        hours_val = float(entry["hours"])
+        dt = datetime.strptime(date_str, "%m/%d/%Y")
+
+        m_from, m_to, a_from, a_to = compute_time_blocks(hours_val)
+
+        # Morning row
+        rows.append((current_row, (dt, m_from, m_to, TASK_DESCRIPTION)))
+        # Afternoon row
+        rows.append((current_row + 1, (dt, a_from, a_to, TASK_DESCRIPTION)))
+
+        current_row += 2
+        progress.advance("fill", index, len(entries))
+
+    return rows
+
+
 # ---------- Backend: Windows COM Excel + PDF ----------
 
 
-def run_step2_windows(entries, period_str):
-    if win32 is None:
+def run_step2_windows(entries, period_str, template_path=None, output_dir=None,
+                      full_name=None, excel=None):
+    """
+    Fill the template through Excel COM and export the PDF.
+
+    excel: an Excel.Application-like object to use instead of dispatching
+    the real one (e.g. springahead_fake_excel.FakeExcel on Linux).
+    Returns the PDF path, or None if the export failed.
+    """
+    if excel is None and win32 is None:
         raise RuntimeError(
             "pywin32 (win32com.client) is not available on this system.\n"
             "Install it with:\n    pip install pywin32\n\n"
             "Or run this script on a platform where openpyxl is available."
         )
 
-    excel = win32.Dispatch("Excel.Application")
-    excel.Visible = True  # set False if you want headless
+    with progress.phase("load"):
+        if excel is None:
+            excel = win32.Dispatch("Excel.Application")
+        excel.Visible = True  # set False if you want headless
 
-    wb = excel.Workbooks.Open(TEMPLATE_PATH)
-    ws = wb.Worksheets(1)  # assume first sheet is the invoice
+        wb = excel.Workbooks.Open(template_path or TEMPLATE_PATH)
+        ws = wb.Worksheets(1)  # assume first sheet is the invoice
 
     consultant_cell = ws.Cells(6, 2)  # B6
 
@@ -240,146 +352,229 @@ def run_step2_windows(entries, period_str):
     def set_cell_value(val):
         consultant_cell.Value = val
 
-    full_name, short_name = resolve_consultant_name(get_cell_value, set_cell_value)
+    full_name, short_name = resolve_consultant_name(
+        get_cell_value, set_cell_value, full_name=full_name
+    )
 
     try:
-        # ----- Invoice Number (merged E4:F4 → anchor E4) -----
-        invoice_cell = ws.Cells(4, 5)  # E4
-        current_number = invoice_cell.Value
-        if current_number is None:
-            current_number = 0
-        try:
-            current_number = int(current_number)
-        except Exception:
-            current_number = 0
-        new_number = current_number + 1
-        invoice_cell.Value = new_number
-
-        # ----- Period (merged E5:F5 → anchor E5) -----
-        period_cell = ws.Cells(5, 5)  # E5
-        period_cell.Value = period_str
-
-        # ----- Clear only A–D rows 9–38 -----
-        first_data_row = 9
-        last_data_row = 38
-        for r in range(first_data_row, last_data_row + 1):
-            ws.Cells(r, 1).Value = None  # A: Date
-            ws.Cells(r, 2).Value = None  # B: From
-            ws.Cells(r, 3).Value = None  # C: To
-            ws.Cells(r, 4).Value = None  # D: Task
-
-        # ----- Fill rows from JSON entries -----
-        current_row = first_data_row
-
-        for entry in entries:
-            if current_row + 1 > last_data_row:
-                print("Warning: not enough rows in template to fit all entries.")
-                break
-
-            date_str = entry["date"]  # e.g. "11/2/2025"
-            hours_val = float(entry["hours"])
-            dt = datetime.strptime(date_str, "%m/%d/%Y")
-
-            m_from, m_to, a_from, a_to = compute_time_blocks(hours_val)
-
-            # Morning row
-            ws.Cells(current_row, 1).Value = dt
-            ws.Cells(current_row, 2).Value = m_from
-            ws.Cells(current_row, 3).Value = m_to
-            ws.Cells(current_row, 4).Value = "Remote IT Support"
-
-            # Afternoon row
-            ws.Cells(current_row + 1, 1).Value = dt
-            ws.Cells(current_row + 1, 2).Value = a_from
-            ws.Cells(current_row + 1, 3).Value = a_to
-            ws.Cells(current_row + 1, 4).Value = "Remote IT Support"
-
-            current_row += 2
+        with progress.phase("fill"):
+            # ----- Invoice Number (merged E4:F4 → anchor E4) -----
+            invoice_cell = ws.Cells(4, 5)  # E4
+            invoice_number = assign_invoice_number(
+                invoice_cell.Value, full_name, period_str
+            )
+            invoice_cell.Value = invoice_number
+
+            # ----- Period (merged E5:F5 → anchor E5) -----
+            period_cell = ws.Cells(5, 5)  # E5
+            period_cell.Value = period_str
+
+            # ----- Clear only A–D rows 9–38 -----
+            for r in range(FIRST_DATA_ROW, LAST_DATA_ROW + 1):
+                ws.Cells(r, 1).Value = None  # A: Date
+                ws.Cells(r, 2).Value = None  # B: From
+                ws.Cells(r, 3).Value = None  # C: To
+                ws.Cells(r, 4).Value = None  # D: Task
+
+            # ----- Fill rows from JSON entries -----
+            for row, values in build_invoice_rows(entries):
+                for col, value in enumerate(values, start=1):
+                    ws.Cells(row, col).Value = value
 
         # ----- Export to PDF -----
         pdf_filename = safe_filename(f"{short_name} INV ({period_str}).pdf")
-        pdf_path = os.path.join(SCRIPT_DIR, pdf_filename)
+        pdf_path = os.path.join(output_dir or SCRIPT_DIR, pdf_filename)
 
         wb.Save()
 
         try:
-            ws.ExportAsFixedFormat(
-                Type=0,  # PDF
-                Filename=pdf_path,
-                Quality=0,
-                IncludeDocProperties=True,
-                IgnorePrintAreas=False,
-                OpenAfterPublish=False,
-            )
-            print(f"Invoice filled and exported to PDF:\n  {pdf_path}")
+            # Raising inside the phase reports it as failed (ok=False)
+            with progress.phase("pdf"):
+                ws.ExportAsFixedFormat(
+                    Type=0,  # PDF
+                    Filename=pdf_path,
+                    Quality=0,
+                    IncludeDocProperties=True,
+                    IgnorePrintAreas=False,
+                    OpenAfterPublish=False,
+                )
         except Exception as e:
             print("Export to PDF failed.")
             print(f"Target path: {pdf_path}")
             print(f"Error: {e}")
             print("Leaving Excel open so you can try exporting manually.")
-            return
+            return None
+        print(f"Invoice filled and exported to PDF:\n  {pdf_path}")
 
+        record_in_ledger(
+            invoice_number, full_name, short_name, period_str, entries, pdf_path=pdf_path
+        )
+        return pdf_path
     finally:
         wb.Close(SaveChanges=True)
         excel.Quit()
 
-def try_convert_with_libreoffice(xlsx_path, short_name, period_str):
-    """
-    Attempt to convert the generated .xlsx invoice to PDF using LibreOffice/soffice.
+LO_TIMEOUT_SECONDS = 120
+LO_PROCESS_NAMES = ("soffice", "soffice.bin", "soffice.exe", "soffice.real")
 
-    This is best-effort:
-      - If LibreOffice isn't installed, we just print a message and keep the .xlsx.
-      - If conversion fails, we print the error and keep the .xlsx.
-    """
-    output_dir = os.path.dirname(xlsx_path)
 
-    # Look for a suitable LibreOffice binary
-    cmd = None
+def find_libreoffice():
+    """Return the LibreOffice binary on PATH ("soffice" / "libreoffice"), or None."""
     for candidate in ("soffice", "libreoffice"):
         if shutil.which(candidate):
-            cmd = candidate
-            break
+            return candidate
+    return None
+
+
+def get_libreoffice_timeout():
+    """
+    Seconds one LibreOffice conversion attempt may take before it is killed.
+
+    SPRINGAHEAD_LO_TIMEOUT overrides the default of 120. A conversion makes
+    at most two attempts, so it never takes much more than twice this.
+    """
+    raw = os.getenv("SPRINGAHEAD_LO_TIMEOUT", "").strip()
+    try:
+        timeout = float(raw) if raw else LO_TIMEOUT_SECONDS
+    except ValueError:
+        timeout = LO_TIMEOUT_SECONDS
+    return timeout if timeout > 0 else LO_TIMEOUT_SECONDS
 
-    if cmd is None:
-        print(
-            "LibreOffice was not found on PATH; skipping automatic PDF export "
-            "on this platform."
-        )
-        return
+
+def default_libreoffice_profile():
+    """The shared office user-installation directory used without profile_dir."""
+    if IS_WINDOWS:
+        return Path(os.getenv("APPDATA", str(Path.home()))) / "LibreOffice" / "4"
+    if sys.platform == "darwin":
+        return Path.home() / "Library" / "Application Support" / "LibreOffice" / "4"
+    config = os.getenv("XDG_CONFIG_HOME") or str(Path.home() / ".config")
+    return Path(config) / "libreoffice" / "4"
+
+
+def find_libreoffice_locks(xlsx_path, profile_dir=None):
+    """
+    Lock files that would block converting xlsx_path, as
+    (profile lock or None, document lock or None).
+    """
+    profile = Path(profile_dir) if profile_dir else default_libreoffice_profile()
+    document = Path(xlsx_path)
+    profile_lock = profile / ".lock"
+    document_lock = document.with_name(f".~lock.{document.name}#")
+    return (
+        profile_lock if profile_lock.exists() else None,
+        document_lock if document_lock.exists() else None,
+    )
+
+
+def clear_stale_libreoffice_locks(xlsx_path, profile_dir=None):
+    """
+    Remove lock files left behind by a killed or crashed LibreOffice.
+
+    A private profile_dir is only used by our own (already killed)
+    conversion, so its profile lock is always stale. The shared profile's
+    lock and the document lock next to the invoice may belong to the
+    user's own LibreOffice (e.g. the previous invoice of the same name is
+    open), so those are only removed when no LibreOffice is running.
+    Returns the removed paths.
+    """
+    profile_lock, document_lock = find_libreoffice_locks(xlsx_path, profile_dir)
+    stale = []
+    if profile_lock is not None and profile_dir:
+        stale.append(profile_lock)
+        profile_lock = None
+    shared = [lock for lock in (profile_lock, document_lock) if lock is not None]
+    if shared and supervisor.process_running(LO_PROCESS_NAMES) is False:
+        stale.extend(shared)
+
+    removed = []
+    for lock in stale:
+        try:
+            lock.unlink()
+            removed.append(str(lock))
+        except OSError as e:
+            print(f"[WARN] Could not remove LibreOffice lock {lock}: {e}")
+    return removed
+
+
+def _run_libreoffice(cmd, xlsx_path, output_dir, profile_dir, timeout):
+    args = [cmd]
+    if profile_dir:
+        args.append("-env:UserInstallation=" + Path(profile_dir).resolve().as_uri())
+    args += [
+        "--headless",
+        "--convert-to",
+        "pdf",
+        "--outdir",
+        output_dir,
+        xlsx_path,
+    ]
+    return supervisor.run_supervised(args, timeout)
+
+
+def convert_with_libreoffice(cmd, xlsx_path, short_name, period_str, profile_dir=None,
+                             timeout=None):
+    """
+    Run one LibreOffice conversion and rename the PDF to our naming convention.
+
+    profile_dir: optional private office user-installation directory. LibreOffice
+    refuses to run two instances on the same profile, so parallel conversions
+    must each use their own.
+
+    Each attempt is killed (with everything it started) after `timeout`
+    seconds (default: get_libreoffice_timeout()). A timed-out attempt, or a
+    failed one that left stale locks behind, is retried once after clearing
+    the locks; without profile_dir the retry uses a fresh private profile,
+    in case a live LibreOffice is holding the shared one.
+
+    Returns the final PDF path, or None if the conversion failed.
+    """
+    output_dir = os.path.dirname(xlsx_path)
+    timeout = timeout or get_libreoffice_timeout()
 
     # We'll ask LibreOffice to write the PDF into the same folder as the .xlsx
     base_name = os.path.splitext(os.path.basename(xlsx_path))[0]
     desired_pdf_name = safe_filename(f"{short_name} INV ({period_str}).pdf")
     desired_pdf_path = os.path.join(output_dir, desired_pdf_name)
-
-    print("\nAttempting automatic PDF export via LibreOffice...")
+    # LibreOffice names the PDF like "<basename>.pdf"
+    generated_pdf = os.path.join(output_dir, base_name + ".pdf")
+
+    start = time.perf_counter()
+    attempts = 0
+    result = None
+    retry_profile = None
+    pdf_path = None
     try:
-        result = subprocess.run(
-            [
-                cmd,
-                "--headless",
-                "--convert-to",
-                "pdf",
-                "--outdir",
-                output_dir,
-                xlsx_path,
-            ],
-            stdout=subprocess.PIPE,
-            stderr=subprocess.PIPE,
-            text=True,
-        )
-        if result.returncode != 0:
+        result = _run_libreoffice(cmd, xlsx_path, output_dir, profile_dir, timeout)
+        attempts = 1
+
+        if not (result.ok and os.path.exists(generated_pdf)):
+            cleared = clear_stale_libreoffice_locks(xlsx_path, profile_dir)
+            for lock in cleared:
+                print(f"Removed stale LibreOffice lock: {lock}")
+            if result.timed_out or cleared:
+                reason = (
+                    f"timed out after {timeout:g}s" if result.timed_out
+                    else "failed on a stale lock"
+                )
+                print(f"LibreOffice PDF conversion {reason}; retrying once...")
+                if not profile_dir:
+                    retry_profile = tempfile.mkdtemp(prefix="springahead_lo_profile_")
+                result = _run_libreoffice(
+                    cmd, xlsx_path, output_dir, profile_dir or retry_profile, timeout
+                )
+                attempts = 2
+
+        if result.timed_out:
+            print(f"LibreOffice PDF conversion timed out after {timeout:g}s and was stopped.")
+            if result.output:
+                print(result.output)
+            print("Leaving the .xlsx invoice as-is.")
+        elif result.returncode != 0:
             print("LibreOffice PDF conversion failed. Output:")
-            if result.stdout:
-                print(result.stdout)
-            if result.stderr:
-                print(result.stderr)
+            if result.output:
+                print(result.output)
             print("Leaving the .xlsx invoice as-is.")
-            return
-
-        # LibreOffice names the PDF like "<basename>.pdf"
-        generated_pdf = os.path.join(output_dir, base_name + ".pdf")
-        if os.path.exists(generated_pdf):
+        elif os.path.exists(generated_pdf):
             # Rename/move to our desired filename if different
             if os.path.abspath(generated_pdf) != os.path.abspath(desired_pdf_path):
                 os.replace(generated_pdf, desired_pdf_path)
@@ -388,6 +583,7 @@ def try_convert_with_libreoffice(xlsx_path, short_name, period_str):
 
             print("Automatic PDF export via LibreOffice succeeded:")
             print(f"  {desired_pdf_path}")
+            pdf_path = desired_pdf_path
         else:
             print(
                 "LibreOffice reported success but the expected PDF was not found.\n"
@@ -398,18 +594,156 @@ def try_convert_with_libreoffice(xlsx_path, short_name, period_str):
         print("LibreOffice PDF conversion raised an exception; leaving .xlsx only.")
         print(f"Error: {e}")
 
+    finally:
+        if retry_profile:
+            shutil.rmtree(retry_profile, ignore_errors=True)
+        elapsed = time.perf_counter() - start
+        print(
+            f"LibreOffice conversion took {elapsed:.1f}s "
+            f"({attempts} attempt(s), limit {timeout:g}s each)."
+        )
+        progress.emit(
+            "conversion",
+            phase="pdf",
+            elapsed=round(elapsed, 3),
+            attempts=attempts,
+            ok=pdf_path is not None,
+            timed_out=bool(result and result.timed_out),
+        )
+
+    return pdf_path
+
+
+def try_convert_with_libreoffice(xlsx_path, short_name, period_str):
+    """
+    Attempt to convert the generated .xlsx invoice to PDF using LibreOffice/soffice.
+
+    This is best-effort:
+      - If LibreOffice isn't installed, we just print a message and keep the .xlsx.
+      - If conversion fails, we print the error and keep the .xlsx.
+
+    Returns the PDF path, or None when no PDF was produced.
+    """
+    cmd = find_libreoffice()
+    if cmd is None:
+        print(
+            "LibreOffice was not found on PATH; skipping automatic PDF export "
+            "on this platform."
+        )
+        return None
+
+    print("\nAttempting automatic PDF export via LibreOffice...")
+    return convert_with_libreoffice(cmd, xlsx_path, short_name, period_str)
+
+
+def get_libreoffice_workers(job_count):
+    """
+    Size of the parallel conversion pool.
+
+    SPRINGAHEAD_LO_WORKERS overrides the default of one worker per CPU core;
+    never more workers than jobs.
+    """
+    raw = os.getenv("SPRINGAHEAD_LO_WORKERS", "").strip()
+    try:
+        workers = int(raw) if raw else (os.cpu_count() or 1)
+    except ValueError:
+        workers = os.cpu_count() or 1
+    return max(1, min(workers, job_count))
+
+
+def convert_many_with_libreoffice(jobs, max_workers=None):
+    """
+    Convert several .xlsx invoices to PDF in parallel.
+
+    jobs: iterable of (xlsx_path, short_name, period_str) tuples.
+
+    Each worker thread gets its own temporary office user-installation
+    directory (created on first use and reused for its later jobs), so the
+    LibreOffice instances don't fight over a shared profile lock.
+
+    Returns {xlsx_path: pdf_path or None} in the order of `jobs`.
+    """
+    jobs = list(jobs)
+    if not jobs:
+        return {}
+
+    cmd = find_libreoffice()
+    if cmd is None:
+        print(
+            "LibreOffice was not found on PATH; skipping automatic PDF export "
+            "on this platform."
+        )
+        return {xlsx_path: None for xlsx_path, _, _ in jobs}
+
+    workers = max_workers or get_libreoffice_workers(len(jobs))
+    local = threading.local()
+    profile_dirs = []
+    profile_lock = threading.Lock()
+
+    def convert(job):
+        xlsx_path, short_name, period_str = job
+        if not hasattr(local, "profile_dir"):
+            local.profile_dir = tempfile.mkdtemp(prefix="springahead_lo_profile_")
+            with profile_lock:
+                profile_dirs.append(local.profile_dir)
+        return convert_with_libreoffice(
+            cmd, xlsx_path, short_name, period_str, profile_dir=local.profile_dir
+        )
+
+    latencies = []
+
+    def collect(payload):
+        if payload["event"] == "conversion":
+            latencies.append(payload["elapsed"])
+
+    print(
+        f"\nConverting {len(jobs)} invoice(s) via LibreOffice "
+        f"with {workers} parallel worker(s)..."
+    )
+    progress.add_callback(collect)
+    try:
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            pdf_paths = list(pool.map(convert, jobs))
+    finally:
+        progress.remove_callback(collect)
+        for profile_dir in profile_dirs:
+            shutil.rmtree(profile_dir, ignore_errors=True)
+
+    if latencies:
+        latencies.sort()
+        print(
+            f"PDF conversion latency: median {latencies[len(latencies) // 2]:.1f}s, "
+            f"slowest {latencies[-1]:.1f}s (limit {get_libreoffice_timeout():g}s per attempt)."
+        )
+
+    for (xlsx_path, _, _), pdf_path in zip(jobs, pdf_paths):
+        if pdf_path:
+            attach_pdf_in_ledger(xlsx_path, pdf_path)
+
+    return {job[0]: pdf_path for job, pdf_path in zip(jobs, pdf_paths)}
+
 # ---------- Backend: openpyxl (cross-platform .xlsx) ----------
 
 
-def run_step2_portable(entries, period_str):
+def run_step2_portable(entries, period_str, template_path=None, output_dir=None,
+                       convert_pdf=True, full_name=None):
+    """
+    Fill the template with openpyxl and save "<short name> INV (<period>).xlsx".
+
+    template_path / output_dir default to TEMPLATE_PATH / SCRIPT_DIR.
+    convert_pdf=False skips the LibreOffice export (e.g. when the caller
+    batches conversions). full_name overrides SPRINGAHEAD_FULL_NAME.
+    Returns the .xlsx path.
+    """
     if load_workbook is None:
         raise RuntimeError(
             "openpyxl is required to generate the invoice on this platform.\n"
             "Install it with:\n    pip install openpyxl"
         )
 
-    wb = load_workbook(TEMPLATE_PATH)
-    ws = wb.worksheets[0]  # first sheet
+    with progress.phase("load"):
+        wb = load_workbook(template_path or TEMPLATE_PATH)
+        ws = wb.worksheets[0]  # first sheet
 
     def get_cell_value():
         return ws["B6"].value
@@ -417,79 +751,155 @@ def run_step2_portable(entries, period_str):
     def set_cell_value(val):
         ws["B6"].value = val
 
-    full_name, short_name = resolve_consultant_name(get_cell_value, set_cell_value)
+    full_name, short_name = resolve_consultant_name(
+        get_cell_value, set_cell_value, full_name=full_name
+    )
 
-    # Invoice number (E4)
-    invoice_cell = ws["E4"]
-    current_number = invoice_cell.value
-    if current_number is None:
-        current_number = 0
-    try:
-        current_number = int(current_number)
-    except Exception:
-        current_number = 0
-    new_number = current_number + 1
-    invoice_cell.value = new_number
-
-    # Period (E5)
-    ws["E5"].value = period_str
-
-    # Clear A–D rows 9–38
-    first_data_row = 9
-    last_data_row = 38
-    for r in range(first_data_row, last_data_row + 1):
-        for c in range(1, 5):  # A–D
-            ws.cell(row=r, column=c, value=None)
-
-    # Fill rows
-    current_row = first_data_row
-    for entry in entries:
-        if current_row + 1 > last_data_row:
-            print("Warning: not enough rows in template to fit all entries.")
-            break
+    with progress.phase("fill"):
+        # Invoice number (E4)
+        invoice_cell = ws["E4"]
+        invoice_number = assign_invoice_number(
+            invoice_cell.value, full_name, period_str
+        )
+        invoice_cell.value = invoice_number
 
-        date_str = entry["date"]
-        hours_val = float(entry["hours"])
-        dt = datetime.strptime(date_str, "%m/%d/%Y")
+        # Period (E5)
+        ws["E5"].value = period_str
 
-        m_from, m_to, a_from, a_to = compute_time_blocks(hours_val)
+        # Clear A–D rows 9–38
+        for r in range(FIRST_DATA_ROW, LAST_DATA_ROW + 1):
+            for c in range(1, 5):  # A–D
+                # ws.cell(..., value=None) would leave the old value in place
+                ws.cell(row=r, column=c).value = None
 
-        # Morning row
-        ws.cell(row=current_row, column=1, value=dt)
-        ws.cell(row=current_row, column=2, value=m_from)
-        ws.cell(row=current_row, column=3, value=m_to)
-        ws.cell(row=current_row, column=4, value="Remote IT Support")
+        # Fill rows
+        for row, values in build_invoice_rows(entries):
+            for col, value in enumerate(values, start=1):
+                ws.cell(row=row, column=col, value=value)
 
-        # Afternoon row
-        ws.cell(row=current_row + 1, column=1, value=dt)
-        ws.cell(row=current_row + 1, column=2, value=a_from)
-        ws.cell(row=current_row + 1, column=3, value=a_to)
-        ws.cell(row=current_row + 1, column=4, value="Remote IT Support")
+    # Save as .xlsx
+    xlsx_filename = safe_filename(f"{short_name} INV ({period_str}).xlsx")
+    xlsx_path = os.path.join(output_dir or SCRIPT_DIR, xlsx_filename)
+    with progress.phase("save"):
+        wb.save(xlsx_path)
+
+    print("Invoice filled and saved as Excel file:")
+    print(f"  {xlsx_path}")
+
+    if not convert_pdf:
+        record_in_ledger(
+            invoice_number, full_name, short_name, period_str, entries, xlsx_path=xlsx_path
+        )
+        return xlsx_path
+
+    # Try automatic PDF export via LibreOffice, if available
+    with progress.phase("pdf"):
+        pdf_path = try_convert_with_libreoffice(xlsx_path, short_name, period_str)
+    record_in_ledger(
+        invoice_number, full_name, short_name, period_str, entries,
+        xlsx_path=xlsx_path, pdf_path=pdf_path,
+    )
+
+    print(
+        "\nIf no PDF file was reported above, you can still open the .xlsx in "
+        "Excel/LibreOffice/Numbers and export to PDF manually."
+    )
+    return xlsx_path
+
+
+
+# ---------- Backend: direct .xlsx XML patching ----------
 
-        current_row += 2
+
+def get_xlsx_backend():
+    """
+    Which non-COM backend to use, from SPRINGAHEAD_XLSX_BACKEND:
+      - "openpyxl" (default): load + save the whole workbook
+      - "patch": rewrite only the invoice cells inside the template zip
+    """
+    raw = os.getenv("SPRINGAHEAD_XLSX_BACKEND", "openpyxl").strip().lower()
+    return "patch" if raw == "patch" else "openpyxl"
+
+
+def build_invoice_cells(entries, period_str, invoice_number):
+    """
+    All invoice cell values as {"E4": ..., "E5": ..., "A9": ..., ...}.
+
+    Mirrors what the openpyxl backend writes: invoice number, period,
+    A–D rows 9–38 cleared, then filled from the entries.
+    """
+    cells = {
+        "E4": invoice_number,
+        "E5": period_str,
+    }
+    for r in range(FIRST_DATA_ROW, LAST_DATA_ROW + 1):
+        for letter in "ABCD":
+            cells[f"{letter}{r}"] = None
+    for row, values in build_invoice_rows(entries):
+        for letter, value in zip("ABCD", values):
+            cells[f"{letter}{row}"] = value
+    return cells
+
+
+def run_step2_patch(entries, period_str, template_path=None, output_dir=None,
+                    convert_pdf=True, full_name=None):
+    """Same contract as run_step2_portable(), using XlsxTemplate."""
+    with progress.phase("load"):
+        template = XlsxTemplate(template_path or TEMPLATE_PATH)
+
+    updates = {}
+
+    def get_cell_value():
+        return updates.get("B6", template.get_value("B6"))
+
+    def set_cell_value(val):
+        updates["B6"] = val
+
+    full_name, short_name = resolve_consultant_name(
+        get_cell_value, set_cell_value, full_name=full_name
+    )
+
+    with progress.phase("fill"):
+        invoice_number = assign_invoice_number(
+            template.get_value("E4"), full_name, period_str
+        )
+        updates.update(build_invoice_cells(entries, period_str, invoice_number))
 
     # Save as .xlsx
     xlsx_filename = safe_filename(f"{short_name} INV ({period_str}).xlsx")
-    xlsx_path = os.path.join(SCRIPT_DIR, xlsx_filename)
-    wb.save(xlsx_path)
+    xlsx_path = os.path.join(output_dir or SCRIPT_DIR, xlsx_filename)
+    with progress.phase("save"):
+        template.save(xlsx_path, updates)
 
     print("Invoice filled and saved as Excel file:")
     print(f"  {xlsx_path}")
 
+    if not convert_pdf:
+        record_in_ledger(
+            invoice_number, full_name, short_name, period_str, entries, xlsx_path=xlsx_path
+        )
+        return xlsx_path
+
     # Try automatic PDF export via LibreOffice, if available
-    try_convert_with_libreoffice(xlsx_path, short_name, period_str)
+    with progress.phase("pdf"):
+        pdf_path = try_convert_with_libreoffice(xlsx_path, short_name, period_str)
+    record_in_ledger(
+        invoice_number, full_name, short_name, period_str, entries,
+        xlsx_path=xlsx_path, pdf_path=pdf_path,
+    )
 
     print(
         "\nIf no PDF file was reported above, you can still open the .xlsx in "
         "Excel/LibreOffice/Numbers and export to PDF manually."
     )
-
+    return xlsx_path
 
 
 # ---------- Main dispatcher ----------
 
 
 def main():
+    memory.install_if_enabled()
     if not os.path.exists(JSON_PATH):
         raise FileNotFoundError(f"JSON not found: {JSON_PATH}")
     if not os.path.exists(TEMPLATE_PATH):
@@ -500,6 +910,8 @@ def main():
 
     if IS_WINDOWS and win32 is not None:
         run_step2_windows(entries, period_str)
+    elif get_xlsx_backend() == "patch":
+        run_step2_patch(entries, period_str)
     else:
         run_step2_portable(entries, period_str)
 
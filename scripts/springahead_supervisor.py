@@ -0,0 +1,160 @@
+"""
+Deadline-bounded subprocess runner.
+
+subprocess.run() without a timeout waits forever on a hung child, and with
+one it only kills the direct child: soffice, for example, starts
+soffice.bin, which keeps running (and holding its profile lock) after the
+wrapper is gone. run_supervised() instead:
+
+    - starts the command in its own process group / session
+    - reads its output line by line on a background thread as it arrives
+      (optionally passing each line to a callback), keeping the last lines
+    - on timeout, kills the whole process group, not just the child
+
+and always returns within about `timeout` seconds plus a short grace period.
+"""
+
+import collections
+import os
+import signal
+import subprocess
+import threading
+import time
+
+try:
+    import psutil  # type: ignore
+except ImportError:
+    psutil = None
+
+KEEP_LINES = 200
+KILL_GRACE_SECONDS = 5
+
+
+class ProcessResult:
+    """What a supervised run did: exit code (None if killed), output, timing."""
+
+    def __init__(self, args, returncode, output, elapsed, timed_out):
+        self.args = args
+        self.returncode = returncode
+        self.output = output
+        self.elapsed = elapsed
+        self.timed_out = timed_out
+
+    @property
+    def ok(self):
+        return not self.timed_out and self.returncode == 0
+
+
+def _popen_group_kwargs():
+    if os.name == "nt":
+        return {"creationflags": subprocess.CREATE_NEW_PROCESS_GROUP}
+    return {"start_new_session": True}
+
+
+def kill_process_group(proc):
+    """Kill `proc` and everything it started (best effort)."""
+    if os.name == "nt":
+        # taskkill /T walks the child tree, which process groups don't on Windows
+        subprocess.run(
+            ["taskkill", "/F", "/T", "/PID", str(proc.pid)],
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+        )
+    else:
+        try:
+            os.killpg(proc.pid, signal.SIGKILL)
+        except (ProcessLookupError, PermissionError):
+            pass
+    try:
+        proc.kill()
+    except OSError:
+        pass
+
+
+def process_running(names):
+    """
+    True if a process with one of `names` (e.g. "soffice.bin") is running,
+    False if none is, None if this can't be told (no psutil and no /proc).
+    """
+    names = {name.lower() for name in names}
+    if psutil is not None:
+        for proc in psutil.process_iter(["name"]):
+            if (proc.info.get("name") or "").lower() in names:
+                return True
+        return False
+    if not os.path.isdir("/proc"):
+        return None
+    for pid in os.listdir("/proc"):
+        if not pid.isdigit():
+            continue
+        try:
+            with open(os.path.join("/proc", pid, "comm"), "r") as f:
+                if f.read().strip().lower() in names:
+                    return True
+        except OSError:
+            continue
+    return False
+
+
+def _pump(stream, lines, on_line):
+    for line in iter(stream.readline, ""):
+        line = line.rstrip("\r\n")
+        lines.append(line)
+        if on_line is not None:
+            try:
+                on_line(line)
+            except Exception:
+                pass
+    stream.close()
+
+
+def run_supervised(args, timeout, on_line=None, cwd=None, env=None):
+    """
+    Run `args` with a hard deadline of `timeout` seconds.
+
+    stdout and stderr are merged and captured incrementally; the last
+    KEEP_LINES lines end up in ProcessResult.output. on_line(line) is
+    called from the reader thread for every line.
+    """
+    start = time.perf_counter()
+    proc = subprocess.Popen(
+        args,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.STDOUT,
+        stdin=subprocess.DEVNULL,
+        text=True,
+        errors="replace",
+        cwd=cwd,
+        env=env,
+        **_popen_group_kwargs(),
+    )
+    lines = collections.deque(maxlen=KEEP_LINES)
+    reader = threading.Thread(
+        target=_pump, args=(proc.stdout, lines, on_line), name="springahead-supervisor", daemon=True
+    )
+    reader.start()
+
+    timed_out = False
+    try:
+        returncode = proc.wait(timeout=timeout)
+    except subprocess.TimeoutExpired:
+        timed_out = True
+        kill_process_group(proc)
+        try:
+            proc.wait(timeout=KILL_GRACE_SECONDS)
+        except subprocess.TimeoutExpired:
+            pass
+        returncode = None
+
+    reader.join(1 if timed_out else KILL_GRACE_SECONDS)
+    if reader.is_alive():
+        # A leftover grandchild still holds the pipe open; it belongs to this run
+        kill_process_group(proc)
+        reader.join(1)
+    return ProcessResult(
+        args=args,
+        returncode=returncode,
+        output="\n".join(lines),
+        elapsed=time.perf_counter() - start,
+        timed_out=timed_out,
+    )
@@ -0,0 +1,424 @@
+"""
+Offline timecard parser – rebuild Step 1's JSON from a saved List view snapshot.
+
+Also turns the timecard's own JSON data responses (captured by Step 1 with
+SPRINGAHEAD_CAPTURE=network) into entries; see entries_from_payload().
+
+Step 1 can save a gzip-compressed copy of the timecard List view HTML for
+each run (set SPRINGAHEAD_SNAPSHOT=1). This module parses such a snapshot
+with the standard library only (no browser, no Playwright) and produces the
+same {"entries": [...]} structure Step 1 writes.
+
+Usage:
+    python springahead_timecard_parser.py                  # newest run's snapshot(s)
+    python springahead_timecard_parser.py path/to/snapshot.html.gz [more.html.gz ...]
+    python springahead_timecard_parser.py snapshot.html.gz --out other.json
+"""
+
+import argparse
+import gzip
+import json
+import re
+import sys
+import time
+from datetime import datetime, timezone
+from html.parser import HTMLParser
+from pathlib import Path
+
+
+def get_app_root() -> Path:
+    if getattr(sys, "frozen", False):
+        return Path(sys.executable).resolve().parent
+    return Path(__file__).resolve().parent
+
+
+APP_ROOT = get_app_root()
+SNAPSHOT_DIR = APP_ROOT / "snapshots"
+SNAPSHOT_STAMP_RE = re.compile(r"^timecard_(\d{8}_\d{6}(?:_\d{6})?)")
+OUTPUT_JSON = APP_ROOT / "springahead_current_week.json"
+
+# Elements that never have a closing tag, so they must not go on the stack
+VOID_TAGS = {
+    "area", "base", "br", "col", "embed", "hr", "img", "input",
+    "link", "meta", "param", "source", "track", "wbr",
+}
+
+
+# ---------- Row rules (shared with the live scrape) ----------
+
+
+def entry_from_cells(date_text, project_text, type_text, hours_text):
+    """
+    Turn the four text cells of one timecard row into an entry dict.
+
+    Returns None for rows Step 1 ignores: empty, non-numeric or zero hours.
+    """
+    if not hours_text:
+        return None
+
+    try:
+        hours_val = float(hours_text)
+    except ValueError:
+        print(f"Skipping row with non-numeric hours: {hours_text!r}")
+        return None
+
+    if hours_val <= 0:
+        return None
+
+    return {
+        "date": date_text,
+        "hours": hours_val,
+        "project": project_text,
+        "type": type_text,
+    }
+
+
+# ---------- HTML parsing ----------
+
+
+class _TimecardHTMLParser(HTMLParser):
+    """
+    Collect the cells Step 1 reads from each `table.timedayTable tr.timeRow`:
+
+        .timedayDate                 -> date
+        span.timedayProject          -> project
+        td.timedayType .timedayType  -> type
+        td.timedayHours              -> hours
+    """
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.rows = []
+        # Stack of (tag, field captured by this element or None)
+        self._stack = []
+        self._table_depth = 0
+        self._row = None
+        self._row_depth = 0
+        self._in_type_cell = 0
+
+    def _field_for(self, tag, classes):
+        if "timedayDate" in classes:
+            return "date"
+        if tag == "span" and "timedayProject" in classes:
+            return "project"
+        if tag == "td" and "timedayHours" in classes:
+            return "hours"
+        if self._in_type_cell and "timedayType" in classes:
+            return "type"
+        return None
+
+    def handle_starttag(self, tag, attrs):
+        if tag in VOID_TAGS:
+            return
+
+        classes = set()
+        for name, value in attrs:
+            if name == "class" and value:
+                classes.update(value.split())
+
+        field = None
+        if tag == "table" and "timedayTable" in classes:
+            self._table_depth += 1
+        elif self._table_depth and tag == "tr" and "timeRow" in classes:
+            self._row = {}
+            self._row_depth = len(self._stack) + 1
+        elif self._row is not None:
+            field = self._field_for(tag, classes)
+            if field and field in self._row:
+                field = None  # first match wins, like a single locator
+            if field:
+                self._row[field] = []
+
+        is_type_cell = self._row is not None and tag == "td" and "timedayType" in classes
+        if is_type_cell:
+            self._in_type_cell += 1
+
+        self._stack.append((tag, field, is_type_cell, "timedayTable" in classes and tag == "table"))
+
+    def handle_endtag(self, tag):
+        if tag in VOID_TAGS:
+            return
+        # Tolerate unclosed children by popping up to the matching tag
+        if not any(item[0] == tag for item in self._stack):
+            return
+        while self._stack:
+            item_tag, _field, is_type_cell, is_table = self._stack.pop()
+            if is_type_cell:
+                self._in_type_cell -= 1
+            if is_table:
+                self._table_depth -= 1
+            if self._row is not None and len(self._stack) + 1 == self._row_depth:
+                self._finish_row()
+            if item_tag == tag:
+                break
+
+    def handle_data(self, data):
+        if self._row is None:
+            return
+        for _tag, field, _is_type_cell, _is_table in self._stack:
+            if field:
+                self._row[field].append(data)
+
+    def _finish_row(self):
+        row = {
+            key: " ".join("".join(parts).split())
+            for key, parts in self._row.items()
+        }
+        self.rows.append(row)
+        self._row = None
+        self._row_depth = 0
+
+    def close(self):
+        super().close()
+        if self._row is not None:
+            self._finish_row()
+
+
+def parse_timecard_html(html):
+    """Return the Step 1 entry list for a timecard List view HTML document."""
+    parser = _TimecardHTMLParser()
+    parser.feed(html)
+    parser.close()
+
+    results = []
+    for row in parser.rows:
+        entry = entry_from_cells(
+            row.get("date", ""),
+            row.get("project", ""),
+            row.get("type", ""),
+            row.get("hours", ""),
+        )
+        if entry is not None:
+            results.append(entry)
+    return results
+
+
+# ---------- JSON data payloads ----------
+
+# Lower-cased key names that identify each field in a timecard record. Date
+# and hours keys are deliberately strict: generic names like "day" or
+# "quantity" would turn unrelated widgets' data into timecard entries.
+PAYLOAD_KEYS = {
+    "date": ("date", "workdate", "entrydate", "timedate", "timedaydate"),
+    "hours": ("hours", "hrs", "totalhours"),
+    "project": ("project", "projectname", "projecttitle", "timedayproject"),
+    "type": ("type", "timetype", "typename", "tasktype", "timedaytype"),
+}
+
+_MS_JSON_DATE_RE = re.compile(r"^/Date\((-?\d+)(?:[+-]\d{4})?\)/$")
+
+
+def normalize_payload_date(value):
+    """
+    Convert the date formats seen in JSON payloads to Step 1's "%m/%d/%Y".
+
+    Handles "11/03/2025", ISO "2025-11-03[T00:00:00]" and ASP.NET
+    "/Date(1762128000000)/". Returns None for anything else.
+    """
+    if not isinstance(value, str):
+        return None
+    value = value.strip()
+
+    match = _MS_JSON_DATE_RE.match(value)
+    if match:
+        dt = datetime.fromtimestamp(int(match.group(1)) / 1000, tz=timezone.utc)
+        return dt.strftime("%m/%d/%Y")
+
+    for fmt in ("%m/%d/%Y", "%Y-%m-%d"):
+        try:
+            return datetime.strptime(value[:10], fmt).strftime("%m/%d/%Y")
+        except ValueError:
+            continue
+    return None
+
+
+def _payload_field(record, field):
+    lowered = {str(key).lower(): value for key, value in record.items()}
+    for key in PAYLOAD_KEYS[field]:
+        if key in lowered:
+            value = lowered[key]
+            if isinstance(value, dict):
+                # e.g. {"project": {"id": 7, "name": "..."}}
+                value = value.get("name") or value.get("Name") or value.get("title")
+            return value
+    return None
+
+
+def _is_number(value):
+    if isinstance(value, bool) or not isinstance(value, (int, float, str)):
+        return False
+    try:
+        float(value)
+    except ValueError:
+        return False
+    return True
+
+
+def payload_records(payload):
+    """
+    Find timecard-like records anywhere in a decoded JSON payload.
+
+    A record is a dict with a real date and numeric hours under one of the
+    PAYLOAD_KEYS names. Returns a list of (date, project, type, hours)
+    text tuples, in payload order.
+    """
+    records = []
+    stack = [payload]
+    while stack:
+        node = stack.pop()
+        if isinstance(node, list):
+            stack.extend(reversed(node))
+            continue
+        if not isinstance(node, dict):
+            continue
+
+        date_text = normalize_payload_date(_payload_field(node, "date"))
+        hours = _payload_field(node, "hours")
+        if date_text and _is_number(hours):
+            records.append((
+                date_text,
+                str(_payload_field(node, "project") or "").strip(),
+                str(_payload_field(node, "type") or "").strip(),
+                str(hours).strip(),
+            ))
+            continue
+
+        stack.extend(reversed(list(node.values())))
+    return records
+
+
+def entries_from_payload(payload):
+    """
+    Step 1 entries from a JSON payload, or None when it holds no timecard records.
+
+    The usual row rules apply (empty, non-numeric and zero hours are skipped).
+    """
+    records = payload_records(payload)
+    if not records:
+        return None
+
+    results = []
+    for date_text, project_text, type_text, hours_text in records:
+        entry = entry_from_cells(date_text, project_text, type_text, hours_text)
+        if entry is not None:
+            results.append(entry)
+    return results
+
+
+# ---------- Snapshots ----------
+
+
+def snapshot_stamp():
+    """Run stamp for snapshot names; microseconds keep same-second runs apart."""
+    return datetime.now().strftime("%Y%m%d_%H%M%S_%f")
+
+
+def save_snapshot(html, snapshot_dir=SNAPSHOT_DIR, stamp=None, label=None):
+    """
+    Write a gzip-compressed HTML snapshot and return its path.
+
+    Snapshots of one multi-week run share a stamp and carry a label
+    ("week1", "week2", ...). An existing file is never overwritten.
+    """
+    snapshot_dir = Path(snapshot_dir)
+    snapshot_dir.mkdir(parents=True, exist_ok=True)
+    name = f"timecard_{stamp or snapshot_stamp()}" + (f"_{label}" if label else "")
+    path = snapshot_dir / f"{name}.html.gz"
+    counter = 1
+    while True:
+        try:
+            with gzip.open(path, "xt", encoding="utf-8") as f:
+                f.write(html)
+            return path
+        except FileExistsError:
+            counter += 1
+            path = snapshot_dir / f"{name}_{counter}.html.gz"
+
+
+def load_snapshot(path):
+    path = Path(path)
+    if path.suffix == ".gz":
+        with gzip.open(path, "rt", encoding="utf-8") as f:
+            return f.read()
+    return path.read_text(encoding="utf-8")
+
+
+def latest_snapshot(snapshot_dir=SNAPSHOT_DIR):
+    snapshots = sorted(Path(snapshot_dir).glob("timecard_*.html*"))
+    return snapshots[-1] if snapshots else None
+
+
+def latest_run_snapshots(snapshot_dir=SNAPSHOT_DIR):
+    """Every snapshot of the newest run (one per week for multi-week runs)."""
+    latest = latest_snapshot(snapshot_dir)
+    if latest is None:
+        return []
+    match = SNAPSHOT_STAMP_RE.match(latest.name)
+    if not match:
+        return [latest]
+    return sorted(Path(snapshot_dir).glob(f"timecard_{match.group(1)}*.html*"))
+
+
+def merge_entries(entry_lists):
+    """
+    Merge per-week entry lists into one list sorted by date.
+
+    Only whole pages are deduplicated: a week that was scraped twice (e.g. a
+    tab that never left the current week) yields the same list and is kept
+    once. Rows inside a page are never collapsed, since a timecard can hold
+    several rows for the same day, project and type.
+    """
+    seen = set()
+    merged = []
+    for entries in entry_lists:
+        page_key = json.dumps(entries, sort_keys=True)
+        if page_key in seen:
+            continue
+        seen.add(page_key)
+        merged.extend(entries)
+    return sorted(
+        merged,
+        key=lambda e: (datetime.strptime(e["date"], "%m/%d/%Y"), e["project"], e["type"]),
+    )
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Rebuild springahead_current_week.json from a saved timecard snapshot."
+    )
+    parser.add_argument(
+        "snapshot",
+        nargs="*",
+        help="Snapshot file(s) (.html or .html.gz), merged by date. "
+             "Default: every snapshot of the newest run in ./snapshots",
+    )
+    parser.add_argument(
+        "--out",
+        default=str(OUTPUT_JSON),
+        help="Where to write the JSON (default: springahead_current_week.json).",
+    )
+    args = parser.parse_args(argv)
+
+    snapshots = [Path(path) for path in args.snapshot] or latest_run_snapshots()
+    if not snapshots:
+        raise FileNotFoundError(f"No timecard snapshot found (looked in {SNAPSHOT_DIR}).")
+    for snapshot in snapshots:
+        if not snapshot.exists():
+            raise FileNotFoundError(f"Timecard snapshot not found: {snapshot}")
+
+    start = time.perf_counter()
+    if len(snapshots) == 1:
+        entries = parse_timecard_html(load_snapshot(snapshots[0]))
+    else:
+        entries = merge_entries(parse_timecard_html(load_snapshot(path)) for path in snapshots)
+    elapsed_ms = (time.perf_counter() - start) * 1000
+    snapshot = snapshots[0] if len(snapshots) == 1 else f"{len(snapshots)} snapshots"
+
+    out_path = Path(args.out)
+    out_path.write_text(json.dumps({"entries": entries}, indent=2), encoding="utf-8")
+    print(f"Parsed {len(entries)} worked day(s) from {snapshot} in {elapsed_ms:.1f} ms")
+    print(f"Saved data to {out_path.resolve()}")
+
+
+if __name__ == "__main__":
+    main()
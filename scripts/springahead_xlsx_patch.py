@@ -0,0 +1,422 @@
+"""
+Direct .xlsx patching backend for Step 2.
+
+Instead of loading the whole template into openpyxl objects and writing every
+part back out, this opens the template as a zip file, rewrites only the
+cells we touch inside the invoice worksheet XML, and copies every other zip
+member through unchanged (styles, drawings, images, other sheets, ...).
+
+Only the standard library is used, so this backend also works where openpyxl
+is not installed.
+
+    template = XlsxTemplate(TEMPLATE_PATH)
+    name = template.get_value("B6")
+    template.save("out.xlsx", {"E4": 42, "E5": "11 - 1 al 15 - 2025"})
+
+Cell values follow openpyxl's conventions: str, int/float, bool, datetime
+(stored as an Excel serial date) or None (clears the value, keeps the style).
+"""
+
+import html
+import io
+import posixpath
+import re
+import zipfile
+from datetime import date, datetime
+from xml.etree import ElementTree as ET
+from xml.sax.saxutils import escape
+
+NS_MAIN = "http://schemas.openxmlformats.org/spreadsheetml/2006/main"
+NS_REL = "http://schemas.openxmlformats.org/officeDocument/2006/relationships"
+NS_PKG_REL = "http://schemas.openxmlformats.org/package/2006/relationships"
+
+# openpyxl's default number format for datetime cells
+DATETIME_FORMAT = "yyyy-mm-dd h:mm:ss"
+
+# Built-in number formats that Excel treats as dates/times
+BUILTIN_DATE_FORMAT_IDS = set(range(14, 23)) | {45, 46, 47}
+
+_CELL_REF_RE = re.compile(r"^([A-Z]+)(\d+)$")
+_SHEET_DATA_RE = re.compile(r"<sheetData\s*/>|<sheetData\b[^>]*>(.*?)</sheetData>", re.S)
+_ROW_RE = re.compile(r"<row\b[^>]*?(?:/>|>.*?</row>)", re.S)
+_CELL_RE = re.compile(r"<c\b[^>]*?(?:/>|>.*?</c>)", re.S)
+_ATTR_RE = re.compile(r'(\w+(?::\w+)?)\s*=\s*"([^"]*)"')
+_TEXT_RE = re.compile(r"<t\b[^>]*?(?:/>|>(.*?)</t>)", re.S)
+_VALUE_RE = re.compile(r"<v>(.*?)</v>", re.S)
+# Open tag only, so both <calcPr .../> and <calcPr ...></calcPr> match;
+# the workbook may use a prefixed namespace (<x:workbook>, <x:calcPr>)
+_CALC_PR_RE = re.compile(r"<((?:[\w.-]+:)?calcPr)\b([^>]*?)(/?)>")
+_AFTER_CALC_PR_RE = re.compile(
+    r"<(?:[\w.-]+:)?(?:oleSize|customWorkbookViews|pivotCaches|smartTagPr|smartTagTypes"
+    r"|webPublishing|fileRecoveryPr|webPublishObjects|extLst)\b"
+)
+_WORKBOOK_END_RE = re.compile(r"</((?:[\w.-]+:)?)workbook\s*>")
+
+
+def split_ref(ref):
+    """'B6' -> (6, 2)"""
+    match = _CELL_REF_RE.match(ref.upper())
+    if not match:
+        raise ValueError(f"Invalid cell reference: {ref!r}")
+    letters, row = match.groups()
+    col = 0
+    for ch in letters:
+        col = col * 26 + (ord(ch) - ord("A") + 1)
+    return int(row), col
+
+
+def _open_tag_attrs(element_xml):
+    open_tag = element_xml[: element_xml.index(">") + 1]
+    return dict(_ATTR_RE.findall(open_tag))
+
+
+def _is_date_format_code(code):
+    # Drop quoted literals and [colour]/[locale] blocks before looking for date tokens
+    code = re.sub(r'"[^"]*"|\[[^\]]*\]', "", code)
+    return bool(re.search(r"[dmyhs]", code, re.I))
+
+
+def _format_number(value):
+    if isinstance(value, bool):
+        return "1" if value else "0"
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return repr(value) if isinstance(value, float) else str(value)
+
+
+class XlsxTemplate:
+    """
+    An .xlsx template held in memory, ready to be patched repeatedly.
+
+    The zip is read once; each save() writes a new file (or buffer) with the
+    given cells replaced in the first worksheet.
+    """
+
+    def __init__(self, source):
+        if isinstance(source, (bytes, bytearray)):
+            source = io.BytesIO(source)
+
+        with zipfile.ZipFile(source) as zf:
+            self._infos = zf.infolist()
+            self._members = {info.filename: zf.read(info.filename) for info in self._infos}
+
+        self.sheet_path = self._first_sheet_path()
+        self._sheet_xml = self._members[self.sheet_path].decode("utf-8")
+        if not _SHEET_DATA_RE.search(self._sheet_xml):
+            raise RuntimeError(
+                f"Unsupported worksheet XML in {self.sheet_path} (no <sheetData>). "
+                "Use the openpyxl backend for this template."
+            )
+        self._shared_strings = None
+        self._epoch = (
+            datetime(1904, 1, 1)
+            if re.search(r'date1904="(1|true)"', self._members["xl/workbook.xml"].decode("utf-8"))
+            else datetime(1899, 12, 30)
+        )
+
+    # ---------- Package structure ----------
+
+    def _first_sheet_path(self):
+        workbook = ET.fromstring(self._members["xl/workbook.xml"])
+        sheet = workbook.find(f"{{{NS_MAIN}}}sheets/{{{NS_MAIN}}}sheet")
+        if sheet is None:
+            raise RuntimeError("Template workbook has no worksheets.")
+        rel_id = sheet.get(f"{{{NS_REL}}}id")
+
+        rels = ET.fromstring(self._members["xl/_rels/workbook.xml.rels"])
+        for rel in rels.findall(f"{{{NS_PKG_REL}}}Relationship"):
+            if rel.get("Id") == rel_id:
+                target = rel.get("Target")
+                if target.startswith("/"):
+                    return target.lstrip("/")
+                return posixpath.normpath(posixpath.join("xl", target))
+        raise RuntimeError(f"Worksheet relationship {rel_id!r} not found in template.")
+
+    @property
+    def shared_strings(self):
+        if self._shared_strings is None:
+            self._shared_strings = []
+            raw = self._members.get("xl/sharedStrings.xml")
+            if raw:
+                root = ET.fromstring(raw)
+                for si in root.findall(f"{{{NS_MAIN}}}si"):
+                    # Plain <t> or rich-text runs <r><t>; phonetic runs are skipped
+                    parts = [si.findtext(f"{{{NS_MAIN}}}t") or ""]
+                    parts += [
+                        r.findtext(f"{{{NS_MAIN}}}t") or ""
+                        for r in si.findall(f"{{{NS_MAIN}}}r")
+                    ]
+                    self._shared_strings.append("".join(parts))
+        return self._shared_strings
+
+    # ---------- Reading ----------
+
+    def _find_cell_xml(self, ref):
+        row_num, _col = split_ref(ref)
+        sheet_data = _SHEET_DATA_RE.search(self._sheet_xml).group(1) or ""
+        for row_xml in _ROW_RE.findall(sheet_data):
+            if _open_tag_attrs(row_xml).get("r") != str(row_num):
+                continue
+            for cell_xml in _CELL_RE.findall(row_xml):
+                if _open_tag_attrs(cell_xml).get("r", "").upper() == ref.upper():
+                    return cell_xml
+        return None
+
+    def get_value(self, ref):
+        """Read one cell of the invoice sheet (strings, numbers, bools; None if empty)."""
+        cell_xml = self._find_cell_xml(ref)
+        if cell_xml is None:
+            return None
+
+        attrs = _open_tag_attrs(cell_xml)
+        cell_type = attrs.get("t", "n")
+
+        if cell_type == "inlineStr":
+            return "".join(html.unescape(t or "") for t in _TEXT_RE.findall(cell_xml))
+
+        match = _VALUE_RE.search(cell_xml)
+        if match is None:
+            return None
+        raw = html.unescape(match.group(1))
+
+        if cell_type == "s":
+            return self.shared_strings[int(raw)]
+        if cell_type in ("str", "e"):
+            return raw
+        if cell_type == "b":
+            return raw == "1"
+        number = float(raw)
+        return int(number) if number.is_integer() else number
+
+    # ---------- Writing ----------
+
+    def _serial_date(self, value):
+        if not isinstance(value, datetime):
+            value = datetime(value.year, value.month, value.day)
+        return (value - self._epoch).total_seconds() / 86400.0
+
+    def _cell_xml(self, ref, value, style):
+        style_attr = f' s="{style}"' if style is not None else ""
+        if value is None:
+            return f'<c r="{ref}"{style_attr}/>'
+        if isinstance(value, str):
+            return (
+                f'<c r="{ref}"{style_attr} t="inlineStr">'
+                f'<is><t xml:space="preserve">{escape(value)}</t></is></c>'
+            )
+        if isinstance(value, bool):
+            return f'<c r="{ref}"{style_attr} t="b"><v>{_format_number(value)}</v></c>'
+        if isinstance(value, (datetime, date)):
+            value = self._serial_date(value)
+        return f'<c r="{ref}"{style_attr}><v>{_format_number(value)}</v></c>'
+
+    def _patch_sheet(self, values, date_style):
+        """
+        Return the worksheet XML with `values` applied.
+
+        date_style: callable(existing_style) -> style index to use for date cells.
+        """
+        # Group requested cells by row -> {col: (ref, value)}
+        pending = {}
+        for ref, value in values.items():
+            row_num, col = split_ref(ref)
+            pending.setdefault(row_num, {})[col] = (ref.upper(), value)
+
+        def patch_cell(cell_xml, col_map):
+            attrs = _open_tag_attrs(cell_xml)
+            ref = attrs.get("r", "").upper()
+            _row, col = split_ref(ref)
+            if col not in col_map:
+                # openpyxl drops cached results of formulas; do the same
+                if "<f" in cell_xml:
+                    cell_xml = _VALUE_RE.sub("", cell_xml)
+                return cell_xml
+            _ref, value = col_map.pop(col)
+            style = attrs.get("s")
+            if isinstance(value, (datetime, date)):
+                style = date_style(style)
+            return self._cell_xml(ref, value, style)
+
+        def new_cells(col_map):
+            cells = []
+            for col in sorted(col_map):
+                ref, value = col_map[col]
+                style = date_style(None) if isinstance(value, (datetime, date)) else None
+                cells.append((col, self._cell_xml(ref, value, style)))
+            col_map.clear()
+            return cells
+
+        def patch_row(row_xml):
+            attrs = _open_tag_attrs(row_xml)
+            row_num = int(attrs["r"])
+            col_map = pending.pop(row_num, {})
+
+            if row_xml.endswith("/>"):
+                open_tag, inner = row_xml[:-2] + ">", ""
+            else:
+                open_tag = row_xml[: row_xml.index(">") + 1]
+                inner = row_xml[len(open_tag): -len("</row>")]
+
+            cells = []
+            for cell_xml in _CELL_RE.findall(inner):
+                _r, col = split_ref(_open_tag_attrs(cell_xml)["r"])
+                cells.append((col, patch_cell(cell_xml, col_map)))
+            cells += new_cells(col_map)
+            cells.sort(key=lambda item: item[0])
+            return open_tag + "".join(xml for _col, xml in cells) + "</row>"
+
+        sheet_match = _SHEET_DATA_RE.search(self._sheet_xml)
+        sheet_data = sheet_match.group(1) or ""
+
+        rows = [
+            (int(_open_tag_attrs(row_xml)["r"]), patch_row(row_xml))
+            for row_xml in _ROW_RE.findall(sheet_data)
+        ]
+        for row_num in sorted(pending):
+            cells = new_cells(pending[row_num])
+            rows.append((row_num, f'<row r="{row_num}">' + "".join(x for _c, x in cells) + "</row>"))
+        rows.sort(key=lambda item: item[0])
+
+        new_sheet_data = "<sheetData>" + "".join(xml for _r, xml in rows) + "</sheetData>"
+        return (
+            self._sheet_xml[: sheet_match.start()]
+            + new_sheet_data
+            + self._sheet_xml[sheet_match.end():]
+        )
+
+    def _date_style_resolver(self):
+        """
+        Mimic openpyxl: a datetime written into a cell without a date number
+        format gets DATETIME_FORMAT. Returns (resolver, patched styles.xml or None).
+        """
+        styles_raw = self._members.get("xl/styles.xml")
+        if styles_raw is None:
+            return (lambda style: style), None
+
+        styles_xml = styles_raw.decode("utf-8")
+        custom_formats = {
+            int(num_id): html.unescape(code)
+            for num_id, code in re.findall(
+                r'<numFmt\b[^>]*numFmtId="(\d+)"[^>]*formatCode="([^"]*)"', styles_xml
+            )
+        }
+        cell_xfs_match = re.search(r"<cellXfs\b[^>]*>(.*?)</cellXfs>", styles_xml, re.S)
+        if cell_xfs_match is None:
+            return (lambda style: style), None
+        xfs = re.findall(r"<xf\b[^>]*?(?:/>|>.*?</xf>)", cell_xfs_match.group(1), re.S)
+
+        state = {"xml": styles_xml, "xfs": xfs, "converted": {}, "changed": False}
+
+        def is_date_xf(index):
+            if index >= len(state["xfs"]):
+                return False
+            num_id = int(_open_tag_attrs(state["xfs"][index]).get("numFmtId", "0"))
+            if num_id in BUILTIN_DATE_FORMAT_IDS:
+                return True
+            return num_id in custom_formats and _is_date_format_code(custom_formats[num_id])
+
+        def resolve(style):
+            index = int(style) if style is not None else 0
+            if is_date_xf(index):
+                return style
+            if index in state["converted"]:
+                return str(state["converted"][index])
+            state["converted"][index] = self._add_datetime_xf(state, index, custom_formats)
+            return str(state["converted"][index])
+
+        return resolve, state
+
+    def _add_datetime_xf(self, state, base_index, custom_formats):
+        """Append a copy of cellXfs[base_index] using DATETIME_FORMAT; return its index."""
+        xml = state["xml"]
+
+        num_id = next(
+            (i for i, code in custom_formats.items() if code == DATETIME_FORMAT), None
+        )
+        if num_id is None:
+            num_id = max([163] + list(custom_formats)) + 1
+            custom_formats[num_id] = DATETIME_FORMAT
+            fmt_xml = f'<numFmt numFmtId="{num_id}" formatCode="{escape(DATETIME_FORMAT)}"/>'
+            if re.search(r"<numFmts\b[^>]*/>", xml):
+                xml = re.sub(r"<numFmts\b[^>]*/>", f'<numFmts count="1">{fmt_xml}</numFmts>', xml, 1)
+            elif "<numFmts" in xml:
+                xml = re.sub(r"</numFmts>", fmt_xml + "</numFmts>", xml, 1)
+                xml = re.sub(
+                    r'(<numFmts\b[^>]*count=")(\d+)(")',
+                    lambda m: f"{m.group(1)}{int(m.group(2)) + 1}{m.group(3)}",
+                    xml,
+                    1,
+                )
+            else:
+                xml = re.sub(
+                    r"(<styleSheet\b[^>]*>)",
+                    lambda m: m.group(1) + f'<numFmts count="1">{fmt_xml}</numFmts>',
+                    xml,
+                    1,
+                )
+
+        base = state["xfs"][base_index] if base_index < len(state["xfs"]) else "<xf/>"
+        attrs = _open_tag_attrs(base)
+        attrs["numFmtId"] = str(num_id)
+        attrs["applyNumberFormat"] = "1"
+        attr_xml = " ".join(f'{key}="{value}"' for key, value in attrs.items())
+        if base.endswith("/>"):
+            new_xf = f"<xf {attr_xml}/>"
+        else:
+            new_xf = f"<xf {attr_xml}>" + base[base.index(">") + 1:]
+
+        xml = re.sub(r"</cellXfs>", new_xf + "</cellXfs>", xml, 1)
+        xml = re.sub(
+            r'(<cellXfs\b[^>]*count=")(\d+)(")',
+            lambda m: f"{m.group(1)}{int(m.group(2)) + 1}{m.group(3)}",
+            xml,
+            1,
+        )
+        state["xfs"].append(new_xf)
+        state["xml"] = xml
+        state["changed"] = True
+        return len(state["xfs"]) - 1
+
+    def _patch_workbook(self):
+        """Ask Excel/LibreOffice to recalculate formulas on open (as openpyxl does)."""
+        xml = self._members["xl/workbook.xml"].decode("utf-8")
+        match = _CALC_PR_RE.search(xml)
+        if match:
+            name, attrs, slash = match.groups()
+            if "fullCalcOnLoad" in attrs:
+                attrs = re.sub(r'fullCalcOnLoad="[^"]*"', 'fullCalcOnLoad="1"', attrs)
+            else:
+                attrs = attrs.rstrip() + ' fullCalcOnLoad="1"'
+            xml = xml[: match.start()] + f"<{name}{attrs}{slash}>" + xml[match.end():]
+        else:
+            # CT_Workbook is ordered: calcPr goes before these (or at the end)
+            end = list(_WORKBOOK_END_RE.finditer(xml))[-1]
+            after = _AFTER_CALC_PR_RE.search(xml)
+            at = after.start() if after else end.start()
+            prefix = end.group(1)
+            xml = xml[:at] + f'<{prefix}calcPr fullCalcOnLoad="1"/>' + xml[at:]
+        return xml.encode("utf-8")
+
+    def render(self, values):
+        """Return the patched .xlsx as bytes."""
+        buffer = io.BytesIO()
+        self.save(buffer, values)
+        return buffer.getvalue()
+
+    def save(self, target, values):
+        """
+        Write the template to `target` (path or file object) with `values`
+        ({"B6": "...", "A9": datetime(...), ...}) applied to the invoice sheet.
+        """
+        resolve_date_style, styles_state = self._date_style_resolver()
+        replaced = {
+            self.sheet_path: self._patch_sheet(values, resolve_date_style).encode("utf-8"),
+            "xl/workbook.xml": self._patch_workbook(),
+        }
+        if styles_state and styles_state["changed"]:
+            replaced["xl/styles.xml"] = styles_state["xml"].encode("utf-8")
+
+        with zipfile.ZipFile(target, "w") as zout:
+            for info in self._infos:
+                data = replaced.get(info.filename, self._members[info.filename])
+                zout.writestr(info, data)
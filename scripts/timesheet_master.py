@@ -8,6 +8,7 @@ except ImportError:
     pywintypes = None  # not available on this platform
 from springahead_step2_invoice import main as step2_main
 
+import springahead_memory as memory
 import springahead_step1_fetch as step1
 import springahead_step2_invoice as step2
 
@@ -35,6 +36,7 @@ def main(gui_mode=False):
     # Make sure we're running from the folder where this script lives
     base_dir = get_app_root()
     os.chdir(base_dir)
+    memory.install_if_enabled()
 
     log("======================================")
     log("  Timesheet Automation – Master Script")